@@ -1,39 +1,67 @@
 """Chat and sessions API."""
 
+import asyncio
+import json
 import os
-from uuid import UUID
+import time
+from collections.abc import AsyncIterator
+from contextlib import nullcontext
+from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException
-from langchain_core.messages import AIMessage, HumanMessage
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.background import BackgroundTask
 
-from app.db import get_db, init_db
+from app.api.turns import session_turns
+from app.db import get_async_db
+from app.db.export import EXPORT_FORMATS, export_stream
 from app.db.sessions import (
     add_message,
-    create_build,
     create_session,
+    decode_cursor,
+    encode_cursor,
     get_latest_build,
     get_messages,
     get_session,
     list_sessions,
-    update_session_title,
+    turn_unit_of_work,
 )
 from app.graph.graph import compile_graph
+from app.metrics import LLM_TTFT
+from app.tools.batch import aiter_builds
+from app.tools.recommend import recommended_build
 
 router = APIRouter(prefix="/api", tags=["chat"])
 
+# Page size bounds for the history endpoints
+MAX_PAGE_SIZE = 200
+# Most specs accepted by one POST /builds/batch
+BATCH_MAX_SPECS = int(os.environ.get("BATCH_MAX_SPECS", "10000"))
+
 # Compile graph once at module load (checkpointer is shared)
 _graph = None
 
 
 def get_graph():
+    # Called from request handlers so the async checkpointer binds to the server's event loop
     global _graph
     if _graph is None:
         _graph = compile_graph(use_checkpointer=True)
     return _graph
 
 
+async def close_graph() -> None:
+    """Release the checkpointer's connections (called on app shutdown)."""
+    global _graph
+    aclose = getattr(getattr(_graph, "checkpointer", None), "aclose", None)
+    if aclose is not None:
+        await aclose()
+    _graph = None
+
+
 class ChatRequest(BaseModel):
     session_id: str | None = None
     message: str
@@ -43,6 +71,19 @@ class ChatResponse(BaseModel):
     session_id: str
     reply: str
     build: dict | None = None
+    context_tokens: dict | None = None  # estimated prompt tokens before/after context trimming
+
+
+class BuildSpec(BaseModel):
+    budget: float
+    region: str = ""
+    use_case: str = "gaming"
+    include_os: bool = True
+    pinned_part_ids: list[str] | None = None
+
+
+class BatchBuildRequest(BaseModel):
+    specs: list[BuildSpec]
 
 
 def _db_messages_to_langchain(messages: list) -> list:
@@ -55,66 +96,214 @@ def _db_messages_to_langchain(messages: list) -> list:
     return out
 
 
-@router.post("/chat", response_model=ChatResponse)
-def post_chat(req: ChatRequest, db: Session = Depends(get_db)):
-    """Send a message and get the assistant reply. Creates a session if session_id is omitted."""
-    init_db()
+def _build_to_dict(build) -> dict | None:
+    if build is None:
+        return None
+    return {
+        "id": build.id,
+        "parts": build.parts,
+        "subtotal": build.subtotal,
+        "tax_rate": build.tax_rate,
+        "total": build.total,
+    }
+
+
+async def _has_checkpoint(graph, session_id: str) -> bool:
+    """True if the graph's checkpointer already holds state for this thread."""
+    checkpointer = getattr(graph, "checkpointer", None)
+    if not checkpointer:
+        return False
+    return await checkpointer.aget_tuple({"configurable": {"thread_id": session_id}}) is not None
 
+
+async def _start_turn(db: AsyncSession, req: ChatRequest, graph) -> tuple[str, list]:
+    """
+    Resolve or create the session, stage the user message, and return (session_id, graph input messages).
+    When the thread is already checkpointed only the new HumanMessage is sent (add_messages appends it to
+    the stored history); the messages table is replayed only for threads without a checkpoint.
+    Writes are staged on db and committed by the turn's unit of work.
+    """
+    history: list = []
     if req.session_id:
-        session = get_session(db, req.session_id)
+        session = await get_session(db, req.session_id)
         if not session:
             raise HTTPException(status_code=404, detail="Session not found")
+        if not await _has_checkpoint(graph, session.id):
+            # No checkpoint (e.g. checkpoint DB was reset): rehydrate the thread from stored messages
+            history = _db_messages_to_langchain(await get_messages(db, session.id))
     else:
-        session = create_session(db)
         # First message: use a short title from the user message
         title = (req.message[:50] + "..." if len(req.message) > 50 else req.message) or "New build"
-        update_session_title(db, session.id, title)
+        session = await create_session(db, title)
+
+    await add_message(db, session.id, "user", req.message)
+    return session.id, [*history, HumanMessage(content=req.message)]
+
+
+async def _finish_turn(db: AsyncSession, session_id: str, reply: str) -> dict | None:
+    """Stage the assistant reply and return the session's latest build (if any)."""
+    await add_message(db, session_id, "assistant", reply)
+    return _build_to_dict(await get_latest_build(db, session_id))
+
 
-    session_id = session.id
-    add_message(db, session_id, "user", req.message)
+def _context_tokens(values: dict) -> dict | None:
+    if "context_tokens_before" not in values:
+        return None
+    return {"before": values["context_tokens_before"], "after": values.get("context_tokens_after")}
 
-    # Load conversation from DB and append new user message
-    db_messages = get_messages(db, session_id)
-    lc_messages = _db_messages_to_langchain(db_messages)
 
-    config = {"configurable": {"thread_id": session_id, "db": db}}
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _run_turn(db: AsyncSession, req: ChatRequest, graph) -> dict:
+    """Run one non-streaming turn in a single unit of work; returns the ChatResponse fields."""
+    async with turn_unit_of_work(db):
+        session_id, lc_messages = await _start_turn(db, req, graph)
+
+        config = {"configurable": {"thread_id": session_id, "db": db}}
+
+        try:
+            result = await graph.ainvoke({"messages": lc_messages}, config=config)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e)) from e
+
+        messages = result.get("messages") or []
+        # Last message from assistant (skip ToolMessages)
+        reply = ""
+        for m in reversed(messages):
+            if isinstance(m, AIMessage):
+                reply = m.content or ""
+                break
+
+        build = await _finish_turn(db, session_id, reply)
+    return {"session_id": session_id, "reply": reply, "build": build, "context_tokens": _context_tokens(result)}
+
+
+@router.post("/chat", response_model=ChatResponse)
+async def post_chat(req: ChatRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    Send a message and get the assistant reply. Creates a session if session_id is omitted.
+    Turns for one session run in order; a duplicate of an in-flight turn shares its reply.
+    """
     graph = get_graph()
+    if not req.session_id:
+        return ChatResponse(**await _run_turn(db, req, graph))
+    if pending := session_turns.pending(req.session_id, req.message):
+        return ChatResponse(**await asyncio.shield(pending))
+    async with session_turns.turn(req.session_id, req.message) as shared:
+        result = await _run_turn(db, req, graph)
+        shared.set_result(result)
+    return ChatResponse(**result)
 
+
+async def _shared_events(session_id: str, pending: asyncio.Future) -> AsyncIterator[str]:
+    """SSE for a duplicate submission: no tokens, just the in-flight turn's outcome."""
+    yield _sse("session", {"session_id": session_id})
     try:
-        result = graph.invoke({"messages": lc_messages}, config=config)
+        result = await asyncio.shield(pending)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        yield _sse("error", {"detail": getattr(e, "detail", None) or str(e)})
+        return
+    yield _sse("done", result)
 
-    messages = result.get("messages") or []
-    # Last message from assistant (skip ToolMessages)
-    reply = ""
-    for m in reversed(messages):
-        if isinstance(m, AIMessage):
-            reply = m.content or ""
-            break
 
-    add_message(db, session_id, "assistant", reply)
+@router.post("/chat/stream")
+async def post_chat_stream(req: ChatRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    Same as POST /chat, but streams the turn as server-sent events.
+    Events: session, token (LLM text deltas), tool_start, tool_end, done (reply + build) or error.
+    The turn (session, both messages, builds) is committed once the graph has finished, and rolled
+    back if it fails. Turns for one session run in order; a duplicate of an in-flight turn only gets
+    its session and done (or error) events.
+    """
+    started = time.perf_counter()
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    graph = get_graph()
+    turn = None
+    if req.session_id:
+        if pending := session_turns.pending(req.session_id, req.message):
+            return StreamingResponse(_shared_events(req.session_id, pending), media_type="text/event-stream", headers=headers)
+        # Registered before any await (and not when the body starts) so an immediate duplicate is coalesced
+        turn = session_turns.turn(req.session_id, req.message)
+        if not await get_session(db, req.session_id):
+            not_found = HTTPException(status_code=404, detail="Session not found")
+            await turn.abandon(not_found)
+            raise not_found
 
-    # Optionally detect build in reply and save (e.g. if we add structured output later)
-    build = None
-    latest = get_latest_build(db, session_id)
-    if latest:
-        build = {
-            "id": latest.id,
-            "parts": latest.parts,
-            "subtotal": latest.subtotal,
-            "tax_rate": latest.tax_rate,
-            "total": latest.total,
-        }
+    async def events() -> AsyncIterator[str]:
+        first_token = True
+        reply = ""
+        context_tokens = None
+        tool_names: dict[str, str] = {}
+        try:
+            async with turn or nullcontext() as shared:
+                # The turn's writes (staged by _start_turn, tool_node and _finish_turn) commit together
+                async with turn_unit_of_work(db):
+                    session_id, lc_messages = await _start_turn(db, req, graph)
+                    yield _sse("session", {"session_id": session_id})
+                    config = {"configurable": {"thread_id": session_id, "db": db}}
+                    async for mode, chunk in graph.astream(
+                        {"messages": lc_messages}, config=config, stream_mode=["messages", "updates"]
+                    ):
+                        if mode == "messages":
+                            msg, metadata = chunk
+                            if metadata.get("langgraph_node") == "llm" and isinstance(msg, AIMessageChunk) and msg.content:
+                                if first_token:
+                                    LLM_TTFT.observe(time.perf_counter() - started)
+                                    first_token = False
+                                yield _sse("token", {"content": msg.content})
+                            continue
+                        for node, update in (chunk or {}).items():
+                            if node == "context":
+                                context_tokens = _context_tokens(update or {})
+                            for m in (update or {}).get("messages") or []:
+                                if node == "llm" and isinstance(m, AIMessage):
+                                    reply = m.content or ""
+                                    for tc in m.tool_calls or []:
+                                        tool_names[tc["id"]] = tc["name"]
+                                        yield _sse("tool_start", {"id": tc["id"], "name": tc["name"], "args": tc.get("args") or {}})
+                                elif node == "tools":
+                                    tc_id = getattr(m, "tool_call_id", None)
+                                    yield _sse("tool_end", {"id": tc_id, "name": tool_names.get(tc_id), "content": str(m.content)})
+                    build = await _finish_turn(db, session_id, reply)
+                done = {"session_id": session_id, "reply": reply, "build": build, "context_tokens": context_tokens}
+                if shared is not None:
+                    shared.set_result(done)
+        except Exception as e:
+            yield _sse("error", {"detail": getattr(e, "detail", None) or str(e)})
+            return
 
-    return ChatResponse(session_id=session_id, reply=reply, build=build)
+        yield _sse("done", done)
+
+    # If the client is gone before the body starts, the background task still releases the turn
+    background = BackgroundTask(turn.abandon) if turn else None
+    return StreamingResponse(events(), media_type="text/event-stream", headers=headers, background=background)
+
+
+def _check_cursor(cursor: str | None) -> None:
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail="Invalid cursor") from e
 
 
 @router.get("/sessions")
-def get_sessions_list(db: Session = Depends(get_db)):
-    """List recent sessions for chat history."""
-    init_db()
-    sessions = list_sessions(db)
+async def get_sessions_list(
+    response: Response,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    List recent sessions for chat history, newest first. When more sessions exist, the X-Next-Cursor
+    header holds the cursor to pass back as ?cursor= for the next page.
+    """
+    _check_cursor(cursor)
+    sessions = await list_sessions(db, limit=limit, before=cursor)
+    if len(sessions) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(sessions[-1].updated_at, sessions[-1].id)
     return [
         {"id": s.id, "title": s.title or "New build", "created_at": s.created_at.isoformat(), "updated_at": s.updated_at.isoformat()}
         for s in sessions
@@ -122,40 +311,97 @@ def get_sessions_list(db: Session = Depends(get_db)):
 
 
 @router.get("/sessions/{session_id}")
-def get_session_detail(session_id: str, db: Session = Depends(get_db)):
-    """Get a session with its messages and latest build."""
-    init_db()
-    session = get_session(db, session_id)
+async def get_session_detail(
+    session_id: str,
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Get a session with its messages and latest build. Without limit all messages are returned; with
+    limit, the newest page of messages (in chronological order) and next_cursor for older messages.
+    """
+    _check_cursor(cursor)
+    session = await get_session(db, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
-    messages = get_messages(db, session_id)
-    latest = get_latest_build(db, session_id)
+    messages = await get_messages(db, session_id, limit=limit, before=cursor)
+    next_cursor = None
+    if limit is not None and len(messages) == limit:
+        next_cursor = encode_cursor(messages[0].created_at, messages[0].id)
+    latest = await get_latest_build(db, session_id)
     return {
         "id": session.id,
         "title": session.title,
         "created_at": session.created_at.isoformat(),
         "updated_at": session.updated_at.isoformat(),
         "messages": [{"role": m.role, "content": m.content, "created_at": m.created_at.isoformat()} for m in messages],
-        "build": (
-            {
-                "id": latest.id,
-                "parts": latest.parts,
-                "subtotal": latest.subtotal,
-                "tax_rate": latest.tax_rate,
-                "total": latest.total,
-            }
-            if latest
-            else None
-        ),
+        "next_cursor": next_cursor,
+        "build": _build_to_dict(latest),
     }
 
 
+@router.post("/builds/batch")
+async def post_builds_batch(req: BatchBuildRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    Optimized builds for many specs without the LLM, streamed as NDJSON in completion order. Each line
+    carries the index of its spec; failed specs get an "error" line instead of a build.
+    """
+    if len(req.specs) > BATCH_MAX_SPECS:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_SPECS} specs per batch")
+    specs = [spec.model_dump() for spec in req.specs]
+
+    async def lines() -> AsyncIterator[str]:
+        async for row in aiter_builds(db, specs):
+            yield json.dumps(row) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@router.get("/export")
+async def get_export(
+    fmt: str = Query("ndjson", alias="format"),
+    since: datetime | None = None,
+    gzip: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Stream every session with its messages and builds as NDJSON or CSV (see app.db.export). since limits
+    the export to rows created or updated at or after it; gzip compresses the stream on the fly.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    media_type = "application/x-ndjson" if fmt == "ndjson" else "text/csv"
+    filename = f"export.{fmt}"
+    if gzip:
+        media_type, filename = "application/gzip", filename + ".gz"
+    return StreamingResponse(
+        export_stream(db, fmt, since=since, gzip=gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/recommendations")
+async def get_recommendation(
+    budget: float = Query(gt=0),
+    region: str = "",
+    use_case: str = "gaming",
+    include_os: bool = True,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Precomputed best build for a budget after tax (see app.tools.recommend); 404 outside the table."""
+    result = await recommended_build(db, budget, region, use_case, include_os)
+    if result is None:
+        raise HTTPException(status_code=404, detail="No precomputed build for this budget and use case")
+    return result
+
+
 @router.get("/builds/{build_id}")
-def get_build_detail(build_id: str, db: Session = Depends(get_db)):
+async def get_build_detail(build_id: str, db: AsyncSession = Depends(get_async_db)):
     """Get a build by id."""
-    init_db()
     from app.db.sessions import get_build
-    build = get_build(db, build_id)
+    build = await get_build(db, build_id)
     if not build:
         raise HTTPException(status_code=404, detail="Build not found")
     return {
@@ -0,0 +1,93 @@
+"""Per-session turn ordering and coalescing of duplicate submissions (per worker process)."""
+
+import asyncio
+
+
+class Turn:
+    """
+    One registered chat turn. Registration happens on creation, so a duplicate arriving before the turn
+    starts still finds it; `async with turn as shared` waits for the session's lock, and the block sets
+    the turn's result on shared. If the block raises, duplicates get the same exception.
+    """
+
+    def __init__(self, turns: "SessionTurns", session_id: str, message: str) -> None:
+        self._turns = turns
+        self.key = (session_id, message)
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._lock = turns._retain(session_id)
+        self._entered = self._finished = False
+
+    async def __aenter__(self) -> asyncio.Future:
+        self._entered = True
+        try:
+            await self._lock.acquire()
+        except BaseException as e:
+            self._finish(e)
+            raise
+        return self.future
+
+    async def __aexit__(self, exc_type, exc, tb) -> bool:
+        self._lock.release()
+        self._finish(exc)
+        return False
+
+    async def abandon(self, exc: Exception | None = None) -> None:
+        """
+        Release a turn that was registered but never entered (e.g. its stream was never iterated);
+        duplicates waiting on it get exc.
+        """
+        if not self._entered:
+            self._finish(exc)
+
+    def _finish(self, exc: BaseException | None) -> None:
+        if self._finished:
+            return
+        self._finished = True
+        if not self.future.done():
+            if exc is None or not isinstance(exc, Exception):
+                exc = RuntimeError("chat turn ended without a result")
+            self.future.set_exception(exc)
+            self.future.exception()  # mark retrieved: there may be no duplicate waiting on it
+        self._turns._discard(self)
+
+
+class SessionTurns:
+    """
+    Turns for one session run one at a time, in arrival order (asyncio.Lock is FIFO); different sessions
+    run in parallel. A submission identical to one still queued or running for the same session (double
+    click, second tab) does not start another graph run: it waits for the in-flight turn and shares its
+    result. State is per process, so route a session's requests to one worker when running several.
+    """
+
+    def __init__(self) -> None:
+        self._locks: dict[str, tuple[asyncio.Lock, int]] = {}  # session id -> (lock, registered turns)
+        self._inflight: dict[tuple[str, str], Turn] = {}
+
+    def pending(self, session_id: str, message: str) -> asyncio.Future | None:
+        """Result future of the in-flight turn with the same session and message, if any."""
+        turn = self._inflight.get((session_id, message))
+        return turn.future if turn else None
+
+    def turn(self, session_id: str, message: str) -> Turn:
+        """Register a new turn for session_id (see Turn)."""
+        turn = Turn(self, session_id, message)
+        self._inflight[turn.key] = turn
+        return turn
+
+    def _retain(self, session_id: str) -> asyncio.Lock:
+        lock, refs = self._locks.get(session_id) or (asyncio.Lock(), 0)
+        self._locks[session_id] = (lock, refs + 1)
+        return lock
+
+    def _discard(self, turn: Turn) -> None:
+        if self._inflight.get(turn.key) is turn:
+            del self._inflight[turn.key]
+        session_id = turn.key[0]
+        lock, refs = self._locks[session_id]
+        if refs == 1:
+            del self._locks[session_id]
+        else:
+            self._locks[session_id] = (lock, refs - 1)
+
+
+session_turns = SessionTurns()
@@ -1,9 +1,10 @@
 """Database package: engine, session factory, and init."""
 
 import os
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, Generator
 
-from sqlalchemy import create_engine
+from sqlalchemy import Index, create_engine, func, inspect, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
 
 from app.db.models import Base
@@ -18,9 +19,103 @@ else:
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+class DatabaseURLError(ValueError):
+    """DATABASE_URL names a database driver that has no async counterpart here."""
+
+
+# dialect -> async driver used for the request path; asyncpg and aiosqlite are in the requirements,
+# aiomysql must be installed separately for MySQL/MariaDB
+_ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg", "mysql": "aiomysql", "mariadb": "aiomysql"}
+# Drivers that already work with create_async_engine (psycopg 3 has sync and async modes)
+_ASYNC_CAPABLE = {"aiosqlite", "asyncpg", "psycopg", "aiomysql", "asyncmy"}
+# Sync drivers that are swapped for the dialect's async driver
+_SYNC_DRIVERS = {"pysqlite", "psycopg2", "psycopg2cffi", "pg8000", "pymysql", "mysqldb", "mysqlconnector"}
+
+
+def _async_url(url: str) -> str:
+    """
+    Map a sync DATABASE_URL to the matching async driver, e.g. sqlite:// and sqlite+pysqlite:// to
+    sqlite+aiosqlite://, postgres://, postgresql:// and postgresql+psycopg2:// to postgresql+asyncpg://.
+    Raises DatabaseURLError for a dialect or driver with no known async equivalent.
+    """
+    scheme, sep, rest = url.partition(":")
+    dialect, _, driver = scheme.lower().partition("+")
+    if dialect == "postgres":
+        dialect = "postgresql"
+    if not sep or dialect not in _ASYNC_DRIVERS:
+        raise DatabaseURLError(
+            f"DATABASE_URL dialect {dialect!r} is not supported; use one of {', '.join(sorted(_ASYNC_DRIVERS))}"
+        )
+    if driver in _ASYNC_CAPABLE:
+        return f"{dialect}+{driver}:{rest}"
+    if driver and driver not in _SYNC_DRIVERS:
+        raise DatabaseURLError(
+            f"DATABASE_URL driver {dialect}+{driver} has no known async equivalent; "
+            f"use {dialect}+{_ASYNC_DRIVERS[dialect]}:// or leave the driver out"
+        )
+    return f"{dialect}+{_ASYNC_DRIVERS[dialect]}:{rest}"
+
+
+# Async engine for the request path (chat turns); the sync engine above is kept for scripts and DDL.
+async_engine = create_async_engine(_async_url(_db_path))
+
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+class MigrationError(RuntimeError):
+    """The existing database cannot be brought to the current schema without manual cleanup."""
+
+
+def _check_unique(index: Index) -> None:
+    """Raise MigrationError if existing rows would violate a unique index that is about to be created."""
+    columns = list(index.columns)
+    names = ", ".join(c.name for c in columns)
+    duplicates = select(*columns).group_by(*columns).having(func.count() > 1)
+    with engine.connect() as conn:
+        count = conn.execute(select(func.count()).select_from(duplicates.subquery())).scalar_one()
+        if not count:
+            return
+        examples = conn.execute(duplicates.limit(3)).all()
+    shown = "; ".join(repr(tuple(row)) for row in examples)
+    raise MigrationError(
+        f"cannot create unique index {index.name} on {index.table.name} ({names}): {count} "
+        f"value(s) occur in more than one row, e.g. {shown}. Delete the extra rows so that each "
+        f"({names}) is unique, then start again."
+    )
+
+
+def _add_missing_columns() -> None:
+    """Add nullable columns that were added to models after their table was created (no migration tool)."""
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {c["name"] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not column.nullable or column.primary_key:
+                continue
+            with engine.begin() as conn:
+                conn.execute(
+                    text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(engine.dialect)}")
+                )
+
+
 def init_db() -> None:
-    """Create all tables."""
+    """
+    Create all tables, plus columns and indexes added to existing tables since they were created. Raises
+    MigrationError when a new unique index cannot be created because existing rows repeat its key.
+    """
     Base.metadata.create_all(bind=engine)
+    _add_missing_columns()
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+            if index.unique:
+                _check_unique(index)
+            index.create(bind=engine)
 
 
 def get_db() -> Generator[Session, None, None]:
@@ -30,3 +125,9 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """Dependency that yields an async DB session."""
+    async with AsyncSessionLocal() as db:
+        yield db
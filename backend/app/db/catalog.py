@@ -0,0 +1,221 @@
+"""In-memory, versioned index of the parts catalog (per process, read-mostly)."""
+
+import asyncio
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.db.compat import CompatibilityIndex
+from app.db.models import CatalogVersion, Part
+
+# How often (seconds) a worker re-reads catalog_version to notice a refresh
+CATALOG_CHECK_SECONDS = float(os.environ.get("CATALOG_CHECK_SECONDS", "5"))
+# Derived structures (e.g. the optimizer's scenarios and hulls) kept per snapshot, least recently used evicted
+CATALOG_DERIVED_SIZE = int(os.environ.get("CATALOG_DERIVED_SIZE", "1024"))
+
+
+@dataclass(frozen=True, slots=True)
+class CategoryIndex:
+    """Parts of one category sorted by price, stored as parallel compact arrays."""
+
+    prices: array
+    ids: tuple[str, ...]
+    names: tuple[str, ...]
+    links: tuple[str | None, ...]
+
+
+class CatalogSnapshot:
+    """Immutable view of the catalog at one version. Answers search/get without SQL."""
+
+    def __init__(self, version: int, rows: list[tuple]) -> None:
+        # rows: (id, category, name, price_usd, link[, specs]); specs are the normalized fields from app.db.compat
+        self.version = version
+        grouped: dict[str, list[tuple]] = {}
+        for row in rows:
+            grouped.setdefault(row[1], []).append(row)
+        self._categories: dict[str, CategoryIndex] = {}
+        self._by_id: dict[str, tuple[str, int]] = {}
+        for category, items in grouped.items():
+            items.sort(key=lambda r: r[3])
+            self._categories[category] = CategoryIndex(
+                prices=array("d", (r[3] for r in items)),
+                ids=tuple(r[0] for r in items),
+                names=tuple(r[2] for r in items),
+                links=tuple(r[4] for r in items),
+            )
+            for i, r in enumerate(items):
+                self._by_id[r[0]] = (category, i)
+        self.compat = CompatibilityIndex(self._categories, {r[0]: r[5] for r in rows if len(r) > 5 and r[5]})
+        self._derived: OrderedDict[Hashable, Any] = OrderedDict()
+        self._derived_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def categories(self) -> list[str]:
+        return list(self._categories)
+
+    def category(self, category: str) -> CategoryIndex | None:
+        """Price-sorted arrays for one category (for bulk consumers such as the build optimizer)."""
+        return self._categories.get(category)
+
+    def snapshot(self, category: str, i: int) -> dict:
+        """Part snapshot (id, category, name, price_usd, link) at position i of a category index."""
+        idx = self._categories[category]
+        return {
+            "id": idx.ids[i],
+            "category": category,
+            "name": idx.names[i],
+            "price_usd": idx.prices[i],
+            "link": idx.links[i],
+        }
+
+    def search(
+        self,
+        category: str,
+        max_price: float | None = None,
+        limit: int = 10,
+        compatible_with: list[str] | None = None,
+    ) -> list[dict]:
+        """
+        Cheapest-first parts in category with price <= max_price (same order as the SQL search).
+        compatible_with restricts results to parts compatible with all of the given part ids.
+        """
+        idx = self._categories.get(category)
+        if idx is None or limit <= 0:
+            return []
+        allowed = self._compatible_positions(category, compatible_with or [])
+        if allowed is None:
+            hi = len(idx.prices) if max_price is None else bisect_right(idx.prices, max_price)
+            return [self.snapshot(category, i) for i in range(min(hi, limit))]
+        hi = len(allowed) if max_price is None else bisect_right(allowed, max_price, key=idx.prices.__getitem__)
+        return [self.snapshot(category, i) for i in allowed[: min(hi, limit)]]
+
+    def _compatible_positions(self, category: str, part_ids: list[str]) -> tuple[int, ...] | None:
+        constraints = [c for c in (self.compat.positions(pid, category) for pid in part_ids) if c is not None]
+        if not constraints:
+            return None
+        if len(constraints) == 1:
+            return constraints[0]
+        common = set(min(constraints, key=len)).intersection(*constraints)
+        return tuple(sorted(common))
+
+    def compatible(self, part_a: str, part_b: str) -> bool:
+        """Whether two catalog parts can go in one build (unknown specs and unrelated categories never conflict)."""
+        loc_a, loc_b = self._by_id.get(part_a), self._by_id.get(part_b)
+        if loc_a is None or loc_b is None:
+            return True
+        for pid, (category, pos) in ((part_a, loc_b), (part_b, loc_a)):
+            allowed = self.compat.positions(pid, category)
+            if allowed is not None:
+                i = bisect_left(allowed, pos)
+                if i == len(allowed) or allowed[i] != pos:
+                    return False
+        return True
+
+    def derived(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        compute() cached on this snapshot under key, so it is shared by every caller of this catalog
+        version and dropped with it. Thread-safe; the result must not be mutated by callers.
+        """
+        with self._derived_lock:
+            if key in self._derived:
+                self._derived.move_to_end(key)
+                return self._derived[key]
+        value = compute()  # outside the lock: a racing thread at worst computes the same value twice
+        with self._derived_lock:
+            self._derived[key] = value
+            while len(self._derived) > CATALOG_DERIVED_SIZE:
+                self._derived.popitem(last=False)
+        return value
+
+    def get(self, part_id: str) -> dict | None:
+        """Part snapshot by id, or None."""
+        loc = self._by_id.get(part_id)
+        if loc is None:
+            return None
+        return self.snapshot(*loc)
+
+    def get_many(self, part_ids: list[str]) -> tuple[list[dict], list[str]]:
+        """
+        Resolve many ids in one pass. Returns (snapshots in input order, duplicates kept; unknown ids
+        in input order).
+        """
+        found: list[dict] = []
+        unknown: list[str] = []
+        for pid in part_ids:
+            loc = self._by_id.get(pid)
+            if loc is None:
+                unknown.append(pid)
+            else:
+                found.append(self.snapshot(*loc))
+        return found, unknown
+
+
+_PART_COLUMNS = (Part.id, Part.category, Part.name, Part.price_usd, Part.link, Part.specs)
+
+_snapshot: CatalogSnapshot | None = None
+_checked_at = 0.0
+_reload_lock: asyncio.Lock | None = None
+
+
+async def _read_version(db: AsyncSession) -> int:
+    version = (await db.execute(select(CatalogVersion.version).where(CatalogVersion.id == 1))).scalar()
+    return version or 0
+
+
+async def get_catalog(db: AsyncSession) -> CatalogSnapshot:
+    """
+    Current catalog snapshot. The version row is re-checked at most every CATALOG_CHECK_SECONDS;
+    when it changed the catalog is reloaded and swapped in with a single assignment, so readers
+    always see one consistent version.
+    """
+    global _snapshot, _checked_at, _reload_lock
+    if _snapshot is not None and time.monotonic() - _checked_at < CATALOG_CHECK_SECONDS:
+        return _snapshot
+    if _reload_lock is None:
+        _reload_lock = asyncio.Lock()
+    async with _reload_lock:
+        if _snapshot is not None and time.monotonic() - _checked_at < CATALOG_CHECK_SECONDS:
+            return _snapshot
+        version = await _read_version(db)
+        if _snapshot is None or _snapshot.version != version:
+            rows = (await db.execute(select(*_PART_COLUMNS))).all()
+            _snapshot = CatalogSnapshot(version, [tuple(r) for r in rows])
+        _checked_at = time.monotonic()
+        return _snapshot
+
+
+def load_catalog(db: Session) -> CatalogSnapshot:
+    """Build a fresh snapshot with a sync session (scripts and worker processes; no caching)."""
+    version = db.execute(select(CatalogVersion.version).where(CatalogVersion.id == 1)).scalar() or 0
+    rows = db.execute(select(*_PART_COLUMNS)).all()
+    return CatalogSnapshot(version, [tuple(r) for r in rows])
+
+
+def invalidate_catalog() -> None:
+    """Force the next get_catalog call to re-check the version (e.g. after an in-process refresh)."""
+    global _checked_at
+    _checked_at = 0.0
+
+
+def bump_catalog_version(db: Session) -> int:
+    """Increment the catalog version after a refresh (sync; used by scripts). Commits and returns the new version."""
+    row = db.get(CatalogVersion, 1)
+    if row is None:
+        row = CatalogVersion(id=1, version=1)
+        db.add(row)
+    else:
+        row.version += 1
+    db.commit()
+    return row.version
@@ -0,0 +1,185 @@
+"""Part compatibility: normalized spec fields and a precomputed compatibility index over the catalog."""
+
+import math
+import re
+from collections.abc import Callable
+from typing import Any
+
+# Normalized spec fields (stored in Part.specs by scripts/refresh_parts.py):
+#   socket (CPU, Motherboard), memory_type (CPU, Motherboard, Memory), cooler_sockets (CPU Cooler),
+#   tdp_w and recommended_psu_w (GPU), wattage_w (Power Supply).
+# Explicit vendor specs win; missing fields are inferred from the product name where that is reliable.
+# A field that stays unknown never rules a part out.
+
+# Headroom over GPU board power for the rest of the system when a GPU has no recommended PSU wattage
+PSU_HEADROOM_W = 300
+
+_CHIPSET_SOCKETS: dict[str, str] = {
+    **dict.fromkeys(["X870E", "X870", "X670E", "X670", "B850", "B650E", "B650", "B840", "A620"], "AM5"),
+    **dict.fromkeys(["X570", "B550", "A520", "X470", "B450", "A320"], "AM4"),
+    **dict.fromkeys(["Z890", "B860", "H810"], "LGA1851"),
+    **dict.fromkeys(["Z790", "B760", "H770", "H610", "Z690", "B660", "H670"], "LGA1700"),
+    **dict.fromkeys(["TRX50", "WRX90"], "STR5"),
+}
+_SOCKET_MEMORY: dict[str, str] = {"AM5": "DDR5", "LGA1851": "DDR5", "STR5": "DDR5", "AM4": "DDR4"}
+
+# Typical board power (W) by GPU model; first match wins, so more specific names come first
+_GPU_TDP_W: list[tuple[str, int]] = [
+    ("RTX PRO 6000", 600), ("RTX 5090", 575), ("RTX 5080", 360), ("RTX 5070 TI", 300), ("RTX 5070", 250),
+    ("RTX 5060 TI", 180), ("RTX 5060", 145), ("RTX 5050", 130), ("RTX 4090", 450), ("RTX 4080", 320),
+    ("RTX 4070 TI", 285), ("RTX 4070", 200), ("RTX 4060 TI", 165), ("RTX 4060", 115), ("RTX 3090 TI", 450),
+    ("RTX 3090", 350), ("RTX 3080", 320), ("RTX 3070", 220), ("RTX 3060", 170), ("RX 9070 XT", 304),
+    ("RX 9070", 220), ("RX 9060 XT", 160), ("RX 9060", 132), ("RX 7900 XTX", 355), ("RX 7900 XT", 315),
+    ("RX 7800 XT", 263), ("RX 7700 XT", 245), ("RX 7650 GRE", 165), ("RX 7600", 165), ("ARC B580", 190),
+    ("ARC B570", 150),
+]
+
+_CHIPSET_RE = re.compile(r"\b(TRX50|WRX90|[ABHXZ]\d{3}E?)(?=[MI]?\b)")  # B650M / X870I form-factor suffixes
+_RYZEN_RE = re.compile(r"\bRYZEN [3579] (\d)\d{3}")
+_INTEL_LGA1700_RE = re.compile(r"\bI[3579]-1[234]\d{3}")
+_INTEL_LGA1851_RE = re.compile(r"\bCORE ULTRA [3579] 2\d{2}")
+_DDR_RE = re.compile(r"\b(DDR[345])\b")
+_WATTS_RE = re.compile(r"\b(\d{3,4})\s?W\b")
+_NUMBER_RE = re.compile(r"\s*(\d+(?:\.\d+)?)")
+
+# Numeric spec fields; feeds may send them with units ("750W", "750 W")
+_NUMERIC_FIELDS = ("tdp_w", "recommended_psu_w", "wattage_w")
+
+
+def _number(value: Any) -> float | None:
+    """Leading number of a spec value ("750W" -> 750.0); None when there is none (unknown)."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    m = _NUMBER_RE.match(str(value)) if value is not None else None
+    return float(m.group(1)) if m else None
+
+
+def _norm_socket(value: Any) -> str | None:
+    if not value:
+        return None
+    return re.sub(r"[\s_-]|SOCKET", "", str(value).upper()) or None
+
+
+def _infer(category: str, name: str) -> dict[str, Any]:
+    upper = name.upper()
+    out: dict[str, Any] = {}
+    if category == "CPU":
+        if "THREADRIPPER" in upper and re.search(r"\b7\d{3}", upper):
+            out["socket"] = "STR5"
+        elif (m := _RYZEN_RE.search(upper)) and "RYZEN AI" not in upper:
+            out["socket"] = "AM5" if m.group(1) in "789" else "AM4"
+        elif _INTEL_LGA1851_RE.search(upper):
+            out["socket"] = "LGA1851"
+        elif _INTEL_LGA1700_RE.search(upper):
+            out["socket"] = "LGA1700"
+    elif category == "Motherboard":
+        m = _CHIPSET_RE.search(upper)
+        if m and m.group(1) in _CHIPSET_SOCKETS:
+            out["socket"] = _CHIPSET_SOCKETS[m.group(1)]
+        if m := _DDR_RE.search(upper):
+            out["memory_type"] = m.group(1)
+    elif category == "Memory":
+        if m := _DDR_RE.search(upper):
+            out["memory_type"] = m.group(1)
+    elif category == "Power Supply":
+        if m := _WATTS_RE.search(upper):
+            out["wattage_w"] = int(m.group(1))
+    elif category == "GPU":
+        for model, watts in _GPU_TDP_W:
+            if model in upper:
+                out["tdp_w"] = watts
+                break
+    return out
+
+
+def normalize_specs(category: str, name: str, specs: dict[str, Any] | None) -> dict[str, Any] | None:
+    """Return specs with the normalized compatibility fields filled in (explicit values take precedence)."""
+    merged = {**_infer(category, name or ""), **{k.lower(): v for k, v in (specs or {}).items()}}
+    for field in _NUMERIC_FIELDS:
+        if field in merged:
+            number = _number(merged[field])
+            if number is None:
+                del merged[field]  # unparseable: unknown, so it never rules a part out
+            else:
+                merged[field] = int(number) if number.is_integer() else number
+    if merged.get("socket"):
+        merged["socket"] = _norm_socket(merged["socket"])
+    if merged.get("cooler_sockets"):
+        merged["cooler_sockets"] = sorted(filter(None, (_norm_socket(s) for s in merged["cooler_sockets"])))
+    if category in ("CPU", "Motherboard") and not merged.get("memory_type"):
+        if memory_type := _SOCKET_MEMORY.get(merged.get("socket") or ""):
+            merged["memory_type"] = memory_type
+    if merged.get("memory_type"):
+        merged["memory_type"] = str(merged["memory_type"]).upper()
+    if category == "GPU" and merged.get("tdp_w") and not merged.get("recommended_psu_w"):
+        merged["recommended_psu_w"] = math.ceil(merged["tdp_w"]) + PSU_HEADROOM_W
+    return merged or None
+
+
+def _eq(a: Any, b: Any) -> bool:
+    return a == b
+
+
+def _in(sockets: Any, socket: Any) -> bool:
+    return socket in sockets
+
+
+def _le(need: Any, have: Any) -> bool:
+    # Specs stored before normalize_specs parsed units may still be strings; unparseable means unknown
+    need, have = _number(need), _number(have)
+    return need is None or have is None or need <= have
+
+
+# (category A, category B, field on A, field on B, predicate(A value, B value)); applied in both directions
+COMPAT_RULES: list[tuple[str, str, str, str, Callable[[Any, Any], bool]]] = [
+    ("CPU", "Motherboard", "socket", "socket", _eq),
+    ("CPU", "Memory", "memory_type", "memory_type", _eq),
+    ("Motherboard", "Memory", "memory_type", "memory_type", _eq),
+    ("CPU Cooler", "CPU", "cooler_sockets", "socket", _in),
+    ("CPU Cooler", "Motherboard", "cooler_sockets", "socket", _in),
+    ("GPU", "Power Supply", "recommended_psu_w", "wattage_w", _le),
+]
+
+
+def _key(value: Any) -> Any:
+    if value is None or value == "" or value == []:
+        return None
+    return frozenset(value) if isinstance(value, (list, tuple, set)) else value
+
+
+class CompatibilityIndex:
+    """
+    Adjacency from (part id, target category) to the compatible positions in that category's
+    price-sorted index. Parts with the same normalized key share one position tuple, so memory grows
+    with distinct spec values rather than with pairs. A missing entry means "no constraint".
+    """
+
+    def __init__(self, categories: dict, specs: dict[str, dict[str, Any]]) -> None:
+        # categories: category -> CategoryIndex (ids in price order); specs: part id -> normalized specs
+        self._adj: dict[tuple[str, str], tuple[int, ...]] = {}
+        for cat_a, cat_b, field_a, field_b, pred in COMPAT_RULES:
+            self._add(categories, specs, cat_a, cat_b, field_a, field_b, pred)
+            self._add(categories, specs, cat_b, cat_a, field_b, field_a, lambda x, y, p=pred: p(y, x))
+
+    def _add(self, categories, specs, src, dst, field_src, field_dst, pred) -> None:
+        src_idx, dst_idx = categories.get(src), categories.get(dst)
+        if src_idx is None or dst_idx is None:
+            return
+        groups: dict[Any, list[int]] = {}
+        for pos, pid in enumerate(dst_idx.ids):
+            groups.setdefault(_key((specs.get(pid) or {}).get(field_dst)), []).append(pos)
+        by_key: dict[Any, tuple[int, ...]] = {}
+        for pid in src_idx.ids:
+            k = _key((specs.get(pid) or {}).get(field_src))
+            if k is None:
+                continue
+            if k not in by_key:
+                by_key[k] = tuple(sorted(p for kd, ps in groups.items() if kd is None or pred(k, kd) for p in ps))
+            prev = self._adj.get((pid, dst))
+            self._adj[(pid, dst)] = by_key[k] if prev is None else tuple(sorted(set(prev) & set(by_key[k])))
+
+    def positions(self, part_id: str, category: str) -> tuple[int, ...] | None:
+        """Compatible positions (ascending price) in category for part_id, or None if unconstrained."""
+        return self._adj.get((part_id, category))
@@ -0,0 +1,156 @@
+"""
+Bulk export of sessions, messages and builds as NDJSON or CSV, streamed with constant memory.
+
+Each table is read through a streaming cursor in batches of EXPORT_BATCH_SIZE rows, in index order
+(sessions by id; messages and builds by (session_id, created_at, id)), and the three streams are merged
+on session id. Every session's record is followed by its messages and then its builds, and no more than
+one batch per table is held in memory.
+"""
+
+import csv
+import io
+import json
+import os
+import zlib
+from collections.abc import AsyncIterator
+from datetime import UTC, datetime
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import Build, Message, Session as SessionModel
+
+EXPORT_BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", "1000"))
+
+EXPORT_FORMATS = ("ndjson", "csv")
+
+# CSV header: the union of all record fields (parts is JSON-encoded)
+CSV_COLUMNS = [
+    "type", "id", "session_id", "title", "role", "content",
+    "subtotal", "tax_rate", "total", "parts", "created_at", "updated_at",
+]
+
+# Bytes of output collected before each write (or gzip compress call)
+_CHUNK_BYTES = 64 * 1024
+
+
+def _naive_utc(ts: datetime | None) -> datetime | None:
+    # Stored timestamps are naive UTC
+    if ts is None or ts.tzinfo is None:
+        return ts
+    return ts.astimezone(UTC).replace(tzinfo=None)
+
+
+async def _stream(db: AsyncSession, query, batch_size: int, kind: str, to_record) -> AsyncIterator[tuple]:
+    result = await db.stream(query.execution_options(yield_per=batch_size))
+    async for row in result:
+        record = to_record(row)
+        yield (record["session_id"], kind, record)
+
+
+async def _next(it: AsyncIterator):
+    return await anext(it, None)
+
+
+async def iter_export(
+    db: AsyncSession, since: datetime | None = None, batch_size: int = EXPORT_BATCH_SIZE
+) -> AsyncIterator[dict]:
+    """
+    All sessions, messages and builds as dicts with a "type" key, grouped by session. With since, only
+    sessions updated and messages/builds created at or after it (incremental export); a session's new
+    messages are exported even when the session row itself is unchanged.
+    """
+    since = _naive_utc(since)
+
+    sessions = select(SessionModel.id, SessionModel.title, SessionModel.created_at, SessionModel.updated_at)
+    messages = select(Message.id, Message.session_id, Message.role, Message.content, Message.created_at)
+    builds = select(
+        Build.id, Build.session_id, Build.subtotal, Build.tax_rate, Build.total, Build.parts, Build.created_at
+    )
+    if since is not None:
+        sessions = sessions.where(SessionModel.updated_at >= since)
+        messages = messages.where(Message.created_at >= since)
+        builds = builds.where(Build.created_at >= since)
+    sessions = sessions.order_by(SessionModel.id)
+    messages = messages.order_by(Message.session_id, Message.created_at, Message.id)
+    builds = builds.order_by(Build.session_id, Build.created_at, Build.id)
+
+    streams = [
+        _stream(db, sessions, batch_size, "0", lambda r: {
+            "type": "session", "id": r.id, "session_id": r.id, "title": r.title,
+            "created_at": r.created_at.isoformat(), "updated_at": r.updated_at.isoformat(),
+        }),
+        _stream(db, messages, batch_size, "1", lambda r: {
+            "type": "message", "id": r.id, "session_id": r.session_id, "role": r.role, "content": r.content,
+            "created_at": r.created_at.isoformat(),
+        }),
+        _stream(db, builds, batch_size, "2", lambda r: {
+            "type": "build", "id": r.id, "session_id": r.session_id, "subtotal": r.subtotal,
+            "tax_rate": r.tax_rate, "total": r.total, "parts": r.parts, "created_at": r.created_at.isoformat(),
+        }),
+    ]
+    # Merge on (session id, record kind); each stream is already in that order
+    heads = [await _next(s) for s in streams]
+    while True:
+        live = [i for i, h in enumerate(heads) if h is not None]
+        if not live:
+            return
+        i = min(live, key=lambda j: heads[j][:2])
+        yield heads[i][2]
+        heads[i] = await _next(streams[i])
+
+
+async def ndjson_chunks(records: AsyncIterator[dict]) -> AsyncIterator[str]:
+    async for record in records:
+        yield json.dumps(record) + "\n"
+
+
+async def csv_chunks(records: AsyncIterator[dict]) -> AsyncIterator[str]:
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=CSV_COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    async for record in records:
+        if record.get("parts") is not None:
+            record = {**record, "parts": json.dumps(record["parts"])}
+        writer.writerow(record)
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    yield buf.getvalue()
+
+
+async def coalesce(chunks: AsyncIterator[str]) -> AsyncIterator[bytes]:
+    """Join small text chunks into encoded blocks of about _CHUNK_BYTES (one write per block)."""
+    pending: list[bytes] = []
+    size = 0
+    async for chunk in chunks:
+        data = chunk.encode()
+        pending.append(data)
+        size += len(data)
+        if size >= _CHUNK_BYTES:
+            yield b"".join(pending)
+            pending, size = [], 0
+    if pending:
+        yield b"".join(pending)
+
+
+async def gzip_chunks(blocks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Gzip a byte stream on the fly."""
+    compressor = zlib.compressobj(wbits=31)  # 31: gzip container
+    async for block in blocks:
+        out = compressor.compress(block)
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+def export_stream(
+    db: AsyncSession, fmt: str = "ndjson", since: datetime | None = None, gzip: bool = False
+) -> AsyncIterator[bytes]:
+    """The export in fmt (ndjson or csv) as UTF-8 byte blocks, gzipped when gzip is set."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'. Use one of: {', '.join(EXPORT_FORMATS)}.")
+    records = iter_export(db, since=since)
+    chunks = ndjson_chunks(records) if fmt == "ndjson" else csv_chunks(records)
+    blocks = coalesce(chunks)
+    return gzip_chunks(blocks) if gzip else blocks
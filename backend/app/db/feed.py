@@ -0,0 +1,128 @@
+"""Incremental readers for parts feeds (JSON array, JSONL, CSV) with bounded memory."""
+
+import csv
+import json
+import re
+from collections.abc import Iterator
+from typing import TextIO
+
+# Characters read per refill when scanning a JSON array
+READ_CHUNK = 1 << 16
+
+# Text that may still be the rest of a number cut at a chunk boundary ("12|345", "1.|5", "2e|10")
+_NUMBER_TAIL_RE = re.compile(r"[-+.eE0-9]*")
+
+_CSV_FIELDS = {"category", "name", "price_usd", "link", "specs"}
+
+
+def iter_json_array(f: TextIO, chunk_size: int = READ_CHUNK) -> Iterator[dict]:
+    """
+    Yield the elements of a top-level JSON array one at a time; holds at most one element plus a chunk.
+    Raises ValueError unless the input is exactly one array of comma-separated values (whitespace aside).
+    """
+    decoder = json.JSONDecoder()
+    buf, pos, eof = "", 0, False
+
+    def refill() -> bool:
+        # Keep the unread tail and append a chunk; False at end of input
+        nonlocal buf, pos, eof
+        if eof:
+            return False
+        more = f.read(chunk_size)
+        eof = not more
+        buf, pos = buf[pos:] + more, 0
+        return bool(more)
+
+    def peek() -> str | None:
+        # Next non-whitespace character (not consumed), or None at end of input
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos].isspace():
+                pos += 1
+            if pos < len(buf):
+                return buf[pos]
+            if not refill():
+                return None
+
+    if peek() != "[":
+        raise ValueError("feed is not a JSON array")
+    pos += 1
+    first = True
+    while True:
+        c = peek()
+        if c is None:
+            raise ValueError("unexpected end of feed: JSON array is not closed")
+        if c == "]":
+            pos += 1
+            break
+        if not first:
+            if c != ",":
+                raise ValueError(f"expected ',' or ']' between feed elements, got {c!r}")
+            pos += 1
+            peek()
+        while True:
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError as e:
+                # Element cut at the chunk boundary: read more and decode it again
+                if refill():
+                    continue
+                raise ValueError(f"invalid JSON in feed: {e}") from e
+            # A number may go on in the next chunk: decode again once the buffer holds a delimiter after it
+            if _NUMBER_TAIL_RE.fullmatch(buf, end) and refill():
+                continue
+            break
+        yield item
+        pos = end
+        first = False
+    if peek() is not None:
+        raise ValueError("unexpected data after the JSON array in feed")
+
+
+def iter_jsonl(f: TextIO) -> Iterator[dict]:
+    """Yield one object per non-empty line."""
+    for line_no, line in enumerate(f, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"invalid JSON on line {line_no}: {e}") from e
+
+
+def iter_csv(f: TextIO) -> Iterator[dict]:
+    """
+    Yield parts from a CSV with a header row. category, name, price_usd and link map to part fields;
+    a specs column is parsed as JSON, and any other non-empty column is added to specs.
+    """
+    for row in csv.DictReader(f):
+        specs = json.loads(row["specs"]) if row.get("specs") else {}
+        specs.update({k: v for k, v in row.items() if k not in _CSV_FIELDS and k and v not in (None, "")})
+        yield {
+            "category": row["category"],
+            "name": row["name"],
+            "price_usd": row["price_usd"],
+            "link": row.get("link") or None,
+            "specs": specs or None,
+        }
+
+
+def feed_format(path: str) -> str:
+    """Guess the feed format from the file extension (json, jsonl or csv)."""
+    lower = path.lower()
+    if lower.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    if lower.endswith(".csv"):
+        return "csv"
+    return "json"
+
+
+def iter_feed(path: str, fmt: str | None = None) -> Iterator[dict]:
+    """Stream parts from a feed file; fmt defaults to the format implied by the extension."""
+    fmt = fmt or feed_format(path)
+    readers = {"json": iter_json_array, "jsonl": iter_jsonl, "csv": iter_csv}
+    if fmt not in readers:
+        raise ValueError(f"unknown feed format: {fmt}")
+    with open(path, newline="" if fmt == "csv" else None, encoding="utf-8") as f:
+        yield from readers[fmt](f)
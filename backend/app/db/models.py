@@ -1,14 +1,20 @@
 """SQLAlchemy models for parts, sessions, messages, and builds."""
 
 import uuid
-from datetime import datetime
+from datetime import UTC, datetime
 from typing import Any
 
-from sqlalchemy import DateTime, Float, ForeignKey, Index, String, Text, func
+from sqlalchemy import DateTime, Float, ForeignKey, Index, Integer, String, Text, func
 from sqlalchemy.dialects.sqlite import JSON
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
+def utcnow() -> datetime:
+    # Microsecond timestamps set client-side: SQLite's CURRENT_TIMESTAMP has one-second resolution,
+    # which would leave rows of the same turn tied in (session_id, created_at) order.
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
 class Base(DeclarativeBase):
     """Base for all models."""
 
@@ -27,9 +33,51 @@ class Part(Base):
     currency: Mapped[str] = mapped_column(String(8), default="USD")
     link: Mapped[str | None] = mapped_column(String(1024), nullable=True)
     specs: Mapped[dict[str, Any] | None] = mapped_column(JSON, nullable=True)
+    content_hash: Mapped[str | None] = mapped_column(String(32), nullable=True)  # hash of price_usd, link, specs
     updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now())
 
-    __table_args__ = (Index("ix_parts_category_price", "category", "price_usd"),)
+    __table_args__ = (
+        Index("ix_parts_category_price", "category", "price_usd"),
+        # Natural key; target of the bulk upsert's ON CONFLICT clause
+        Index("uq_parts_category_name", "category", "name", unique=True),
+    )
+
+
+class PartPriceHistory(Base):
+    """Append-only journal of part price changes written by catalog refreshes."""
+
+    __tablename__ = "part_price_history"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    part_id: Mapped[str] = mapped_column(String(36), ForeignKey("parts.id", ondelete="CASCADE"), nullable=False)
+    old_price_usd: Mapped[float] = mapped_column(Float, nullable=False)
+    new_price_usd: Mapped[float] = mapped_column(Float, nullable=False)
+    changed_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+
+    __table_args__ = (Index("ix_part_price_history_part_changed", "part_id", "changed_at"),)
+
+
+class CatalogVersion(Base):
+    """Single-row counter bumped on every catalog refresh; workers reload their in-memory index when it changes."""
+
+    __tablename__ = "catalog_version"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, default=1)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
+class Recommendation(Base):
+    """Precomputed best build for one (catalog version, use case, pre-tax parts budget) grid point."""
+
+    __tablename__ = "recommendations"
+
+    catalog_version: Mapped[int] = mapped_column(Integer, primary_key=True)
+    use_case: Mapped[str] = mapped_column(String(32), primary_key=True)
+    parts_budget: Mapped[int] = mapped_column(Integer, primary_key=True)  # whole USD, excluding tax and OS
+    part_ids: Mapped[list[str]] = mapped_column(JSON, nullable=False)  # one per BUILD_CATEGORIES entry
+    subtotal: Mapped[float] = mapped_column(Float, nullable=False)
+    score: Mapped[float] = mapped_column(Float, nullable=False)
 
 
 class Session(Base):
@@ -39,12 +87,17 @@ class Session(Base):
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     title: Mapped[str | None] = mapped_column(String(256), nullable=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
-    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now())
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=utcnow, server_default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=utcnow, server_default=func.now(), onupdate=utcnow
+    )
 
     messages: Mapped[list["Message"]] = relationship("Message", back_populates="session", order_by="Message.created_at")
     builds: Mapped[list["Build"]] = relationship("Build", back_populates="session", order_by="Build.created_at")
 
+    # Keyset pagination of the session list: (updated_at, id) descending
+    __table_args__ = (Index("ix_sessions_updated_id", "updated_at", "id"),)
+
 
 class Message(Base):
     """Single message in a session (user or assistant)."""
@@ -55,10 +108,12 @@ class Message(Base):
     session_id: Mapped[str] = mapped_column(String(36), ForeignKey("sessions.id", ondelete="CASCADE"), nullable=False)
     role: Mapped[str] = mapped_column(String(32), nullable=False)  # user, assistant, system
     content: Mapped[str] = mapped_column(Text, nullable=False)
-    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=utcnow, server_default=func.now())
 
     session: Mapped["Session"] = relationship("Session", back_populates="messages")
 
+    __table_args__ = (Index("ix_messages_session_created", "session_id", "created_at", "id"),)
+
 
 class Build(Base):
     """Saved build: list of part snapshots and totals."""
@@ -71,6 +126,8 @@ class Build(Base):
     subtotal: Mapped[float] = mapped_column(Float, nullable=False)
     tax_rate: Mapped[float] = mapped_column(Float, default=0.0)
     total: Mapped[float] = mapped_column(Float, nullable=False)
-    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=utcnow, server_default=func.now())
 
     session: Mapped["Session"] = relationship("Session", back_populates="builds")
+
+    __table_args__ = (Index("ix_builds_session_created", "session_id", "created_at", "id"),)
@@ -1,53 +1,137 @@
-"""CRUD for parts table."""
+"""Writes to the parts table: bulk upsert (sync, refresh script). Reads go through app.db.catalog."""
 
-from sqlalchemy import select
+import hashlib
+import json
+import uuid
+from collections.abc import Iterable
+from dataclasses import dataclass
+from itertools import islice
+
+from sqlalchemy import func, insert, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
-from app.db.models import Part
+from app.db.models import Part, PartPriceHistory
 
 
-def search_parts(
-    db: Session,
-    category: str | None = None,
-    max_price: float | None = None,
-    limit: int = 20,
-) -> list[Part]:
-    """Return parts filtered by category and optional max price."""
-    q = select(Part).order_by(Part.price_usd)
-    if category:
-        q = q.where(Part.category == category)
-    if max_price is not None:
-        q = q.where(Part.price_usd <= max_price)
-    q = q.limit(limit)
-    return list(db.execute(q).scalars().all())
+@dataclass
+class UpsertStats:
+    """Outcome of a bulk upsert."""
 
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    price_changes: int = 0  # rows appended to part_price_history
 
-def get_part_by_id(db: Session, part_id: str) -> Part | None:
-    """Return a part by id or None."""
-    return db.get(Part, part_id)
+    @property
+    def total(self) -> int:
+        return self.inserted + self.updated + self.unchanged
 
 
-def upsert_parts(db: Session, parts: list[dict]) -> int:
-    """Insert or update parts from list of dicts (category, name, price_usd, link, specs). Returns count."""
-    count = 0
-    for p in parts:
-        existing = db.execute(
-            select(Part).where(Part.category == p["category"]).where(Part.name == p["name"])
-        ).scalars().first()
-        if existing:
-            existing.price_usd = float(p["price_usd"])
-            existing.link = p.get("link")
-            existing.specs = p.get("specs")
-        else:
-            db.add(
-                Part(
-                    category=p["category"],
-                    name=p["name"],
-                    price_usd=float(p["price_usd"]),
-                    link=p.get("link"),
-                    specs=p.get("specs"),
+# Rows per statement/transaction; the natural-key IN list (2 params per row) stays far below SQLite's limit
+UPSERT_CHUNK_SIZE = 500
+
+
+def _dialect_insert(db: Session):
+    name = db.get_bind().dialect.name
+    if name == "sqlite":
+        return sqlite_insert
+    if name == "postgresql":
+        return pg_insert
+    raise ValueError(
+        f"bulk_upsert_parts needs INSERT ... ON CONFLICT, which is only implemented for SQLite and "
+        f"PostgreSQL; the database dialect is {name!r}"
+    )
+
+
+def content_hash(price_usd: float, link: str | None, specs: dict | None) -> str:
+    """Stable hash of the mutable part fields; a refresh writes a row only when this changes."""
+    payload = json.dumps([price_usd, link, specs], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+def _upsert_chunk(db: Session, rows: list[dict], stats: UpsertStats) -> None:
+    # Last occurrence of a natural key in the chunk wins (same as applying rows in order)
+    by_key = {(r["category"], r["name"]): r for r in rows}
+    existing = {
+        (c, n): (part_id, price, digest)
+        for c, n, part_id, price, digest in db.execute(
+            select(Part.category, Part.name, Part.id, Part.price_usd, Part.content_hash).where(
+                tuple_(Part.category, Part.name).in_(list(by_key))
+            )
+        )
+    }
+    changed = []
+    price_changes = []
+    for key, r in by_key.items():
+        current = existing.get(key)
+        if current is None:
+            stats.inserted += 1
+        elif current[2] != r["content_hash"]:
+            # Rows written before content hashes existed (hash NULL) are rewritten once to backfill it
+            stats.updated += 1
+            if current[1] != r["price_usd"]:
+                price_changes.append(
+                    {"part_id": current[0], "old_price_usd": current[1], "new_price_usd": r["price_usd"]}
                 )
+        else:
+            stats.unchanged += 1
+            continue
+        changed.append({"id": str(uuid.uuid4()), **r})
+    stats.unchanged += len(rows) - len(by_key)
+    stats.price_changes += len(price_changes)
+    if not changed:
+        return
+    stmt = _dialect_insert(db)(Part)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Part.category, Part.name],
+        set_={
+            "price_usd": stmt.excluded.price_usd,
+            "link": stmt.excluded.link,
+            "specs": stmt.excluded.specs,
+            "content_hash": stmt.excluded.content_hash,
+            "updated_at": func.now(),
+        },
+    )
+    db.execute(stmt, changed)
+    if price_changes:
+        db.execute(insert(PartPriceHistory), price_changes)
+
+
+def bulk_upsert_parts(
+    db: Session,
+    parts: Iterable[dict],
+    chunk_size: int = UPSERT_CHUNK_SIZE,
+) -> UpsertStats:
+    """
+    Insert or update parts keyed on (category, name) with chunked INSERT ... ON CONFLICT DO UPDATE
+    (SQLite and PostgreSQL). Each chunk is one existence SELECT plus one statement for new/changed rows,
+    committed on its own, so memory and transaction size stay bounded for large feeds (parts may be any
+    iterable, e.g. app.db.feed.iter_feed). Rows whose content hash (price_usd, link, specs) is unchanged
+    are not written, so updated_at is left alone; price changes are appended to part_price_history.
+    """
+    stats = UpsertStats()
+    it = iter(parts)
+    while chunk := list(islice(it, chunk_size)):
+        rows = []
+        for p in chunk:
+            price, link, specs = float(p["price_usd"]), p.get("link"), p.get("specs")
+            rows.append(
+                {
+                    "category": p["category"],
+                    "name": p["name"],
+                    "price_usd": price,
+                    "link": link,
+                    "specs": specs,
+                    "content_hash": content_hash(price, link, specs),
+                }
             )
-            count += 1
-    db.commit()
-    return count
+        _upsert_chunk(db, rows, stats)
+        db.commit()
+    return stats
+
+
+def upsert_parts(db: Session, parts: list[dict]) -> int:
+    """Insert or update parts from list of dicts (category, name, price_usd, link, specs). Returns count of new parts."""
+    return bulk_upsert_parts(db, parts).inserted
@@ -1,56 +1,105 @@
-"""CRUD for sessions, messages, and builds."""
-
-from sqlalchemy import select
-from sqlalchemy.orm import Session
-
-from app.db.models import Build, Message, Session as SessionModel
-
-
-def create_session(db: Session, title: str | None = None) -> SessionModel:
-    """Create a new chat session."""
-    s = SessionModel(title=title or "New build")
+"""
+CRUD for sessions, messages, and builds (async; used by the API request path).
+
+Writers only stage changes on the session; the caller owns the transaction (see turn_unit_of_work).
+"""
+
+import base64
+import uuid
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import Build, Message, Session as SessionModel, utcnow
+
+
+def encode_cursor(ts: datetime, row_id: str) -> str:
+    """Opaque keyset cursor for the row at (timestamp, id); pages continue strictly after it."""
+    return base64.urlsafe_b64encode(f"{ts.isoformat()}|{row_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    """Inverse of encode_cursor. Raises ValueError for a malformed cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        ts, row_id = raw.split("|", 1)
+        return datetime.fromisoformat(ts), row_id
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("invalid cursor") from e
+
+
+@asynccontextmanager
+async def turn_unit_of_work(db: AsyncSession) -> AsyncIterator[AsyncSession]:
+    """
+    One transaction per chat turn: everything staged inside is flushed and committed once on exit, or
+    rolled back if the block raises. Writes are not flushed while the turn runs, so on SQLite the write
+    lock is held only for the final commit rather than for the whole LLM round trip.
+    """
+    try:
+        yield db
+        await db.commit()
+    except BaseException:
+        await db.rollback()
+        raise
+
+
+async def create_session(db: AsyncSession, title: str | None = None) -> SessionModel:
+    """Create a new chat session (id assigned immediately; inserted on the next flush)."""
+    now = utcnow()
+    s = SessionModel(id=str(uuid.uuid4()), title=title or "New build", created_at=now, updated_at=now)
     db.add(s)
-    db.commit()
-    db.refresh(s)
     return s
 
 
-def get_session(db: Session, session_id: str) -> SessionModel | None:
+async def get_session(db: AsyncSession, session_id: str) -> SessionModel | None:
     """Get session by id."""
-    return db.get(SessionModel, session_id)
+    return await db.get(SessionModel, session_id)
 
 
-def list_sessions(db: Session, limit: int = 50) -> list[SessionModel]:
-    """List sessions by updated_at desc."""
-    q = select(SessionModel).order_by(SessionModel.updated_at.desc()).limit(limit)
-    return list(db.execute(q).scalars().all())
+async def list_sessions(db: AsyncSession, limit: int = 50, before: str | None = None) -> list[SessionModel]:
+    """
+    List sessions by (updated_at, id) desc. before is a cursor from encode_cursor for the last session of
+    the previous page; the next page seeks on ix_sessions_updated_id instead of skipping rows with OFFSET.
+    """
+    q = select(SessionModel)
+    if before:
+        ts, row_id = decode_cursor(before)
+        q = q.where(tuple_(SessionModel.updated_at, SessionModel.id) < tuple_(ts, row_id))
+    q = q.order_by(SessionModel.updated_at.desc(), SessionModel.id.desc()).limit(limit)
+    return list((await db.execute(q)).scalars().all())
 
 
-def add_message(db: Session, session_id: str, role: str, content: str) -> Message:
-    """Append a message to a session."""
-    m = Message(session_id=session_id, role=role, content=content)
+async def add_message(db: AsyncSession, session_id: str, role: str, content: str) -> Message:
+    """Append a message to a session. Timestamped when staged, so messages of one turn keep their order."""
+    m = Message(id=str(uuid.uuid4()), session_id=session_id, role=role, content=content, created_at=utcnow())
     db.add(m)
-    db.commit()
-    db.refresh(m)
     return m
 
 
-def get_messages(db: Session, session_id: str) -> list[Message]:
-    """Get all messages for a session in order."""
-    q = select(Message).where(Message.session_id == session_id).order_by(Message.created_at)
-    return list(db.execute(q).scalars().all())
-
-
-def update_session_title(db: Session, session_id: str, title: str) -> None:
-    """Set session title (e.g. from first user message)."""
-    s = db.get(SessionModel, session_id)
-    if s:
-        s.title = title[:256] if len(title) > 256 else title
-        db.commit()
-
-
-def create_build(
-    db: Session,
+async def get_messages(
+    db: AsyncSession, session_id: str, limit: int | None = None, before: str | None = None
+) -> list[Message]:
+    """
+    Get messages for a session in chronological order. Without limit, returns all of them. With limit,
+    returns the newest limit messages older than the before cursor (newest page first), still in
+    chronological order; pass encode_cursor of the first message to get the page before it.
+    """
+    q = select(Message).where(Message.session_id == session_id)
+    if before:
+        ts, row_id = decode_cursor(before)
+        q = q.where(tuple_(Message.created_at, Message.id) < tuple_(ts, row_id))
+    if limit is None:
+        q = q.order_by(Message.created_at, Message.id)
+        return list((await db.execute(q)).scalars().all())
+    q = q.order_by(Message.created_at.desc(), Message.id.desc()).limit(limit)
+    return list(reversed((await db.execute(q)).scalars().all()))
+
+
+async def create_build(
+    db: AsyncSession,
     session_id: str,
     parts: list[dict],
     subtotal: float,
@@ -59,29 +108,30 @@ def create_build(
 ) -> Build:
     """Save a build for a session."""
     b = Build(
+        id=str(uuid.uuid4()),
         session_id=session_id,
         parts=parts,
         subtotal=subtotal,
         tax_rate=tax_rate,
         total=total,
+        created_at=utcnow(),
     )
     db.add(b)
-    db.commit()
-    db.refresh(b)
     return b
 
 
-def get_latest_build(db: Session, session_id: str) -> Build | None:
-    """Get the most recent build for a session."""
+async def get_latest_build(db: AsyncSession, session_id: str) -> Build | None:
+    """Get the most recent build for a session (including builds staged in this transaction)."""
+    await db.flush()
     q = (
         select(Build)
         .where(Build.session_id == session_id)
-        .order_by(Build.created_at.desc())
+        .order_by(Build.created_at.desc(), Build.id.desc())
         .limit(1)
     )
-    return db.execute(q).scalars().first()
+    return (await db.execute(q)).scalars().first()
 
 
-def get_build(db: Session, build_id: str) -> Build | None:
+async def get_build(db: AsyncSession, build_id: str) -> Build | None:
     """Get build by id."""
-    return db.get(Build, build_id)
+    return await db.get(Build, build_id)
@@ -0,0 +1,113 @@
+"""Checkpointer factory for the agent graph, selected with the CHECKPOINTER environment variable."""
+
+import os
+
+import aiosqlite
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+from app.metrics import CHECKPOINT_BYTES
+
+# memory: in-process only (tests, single worker); sqlite: one async connection;
+# sqlite-pool: one writer connection plus CHECKPOINT_READERS reader connections.
+CHECKPOINTER = os.environ.get("CHECKPOINTER", "sqlite")
+CHECKPOINT_DB = os.environ.get("CHECKPOINT_DB", "checkpoints.sqlite")
+CHECKPOINT_READERS = int(os.environ.get("CHECKPOINT_READERS", "4"))
+# Seconds a connection waits on a locked database (e.g. another worker process committing) before failing
+CHECKPOINT_BUSY_TIMEOUT = float(os.environ.get("CHECKPOINT_BUSY_TIMEOUT", "30"))
+
+
+class _MeasuredSerde:
+    """Serializer wrapper that records the size of every blob the checkpointer writes."""
+
+    def __init__(self, inner) -> None:
+        self._inner = inner
+
+    def dumps_typed(self, obj):
+        type_, blob = self._inner.dumps_typed(obj)
+        CHECKPOINT_BYTES.observe(len(blob))
+        return type_, blob
+
+    def loads_typed(self, data):
+        return self._inner.loads_typed(data)
+
+    def __getattr__(self, name):
+        return getattr(self._inner, name)
+
+
+class SqliteCheckpointer(AsyncSqliteSaver):
+    """
+    AsyncSqliteSaver tuned for concurrent workers: WAL journal, synchronous=NORMAL and a busy timeout on
+    every connection. With readers > 0, reads (aget_tuple, alist, delta history) go to a pool of
+    read-only connections, so loading one thread's state does not queue behind another thread's writes
+    or reads on the single writer connection. WAL lets the readers see every committed checkpoint.
+    """
+
+    def __init__(self, path: str, readers: int = 0, busy_timeout: float = CHECKPOINT_BUSY_TIMEOUT) -> None:
+        # Connections are started lazily in setup(), inside the event loop that runs the graph
+        super().__init__(aiosqlite.connect(path, timeout=busy_timeout), serde=_MeasuredSerde(JsonPlusSerializer()))
+        self._readers = [AsyncSqliteSaver(aiosqlite.connect(path, timeout=busy_timeout)) for _ in range(readers)]
+        self._next_reader = 0
+
+    async def setup(self) -> None:
+        if self.is_setup:
+            return
+        await super().setup()  # creates the tables and switches the file to WAL
+        async with self.lock:
+            await self.conn.execute("PRAGMA synchronous=NORMAL")
+            for reader in self._readers:
+                if not reader.is_setup:
+                    await reader.conn
+                    await reader.conn.execute("PRAGMA query_only=ON")
+                    reader.is_setup = True
+
+    def _reader(self) -> AsyncSqliteSaver | None:
+        # Prefer an idle reader; otherwise round-robin
+        for reader in self._readers:
+            if not reader.lock.locked():
+                return reader
+        if not self._readers:
+            return None
+        self._next_reader = (self._next_reader + 1) % len(self._readers)
+        return self._readers[self._next_reader]
+
+    async def aget_tuple(self, config):
+        await self.setup()
+        reader = self._reader()
+        return await (reader.aget_tuple(config) if reader else super().aget_tuple(config))
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        await self.setup()
+        reader = self._reader()
+        source = reader.alist if reader else super().alist
+        async for item in source(config, filter=filter, before=before, limit=limit):
+            yield item
+
+    async def aget_delta_channel_history(self, *, config, channels):
+        await self.setup()
+        reader = self._reader()
+        source = reader.aget_delta_channel_history if reader else super().aget_delta_channel_history
+        return await source(config=config, channels=channels)
+
+    async def aclose(self) -> None:
+        """Close the writer and reader connections."""
+        for saver in [self, *self._readers]:
+            await saver.conn.close()
+
+
+def create_checkpointer(kind: str | None = None, path: str | None = None) -> BaseCheckpointSaver:
+    """
+    Create the checkpointer named by kind (default: CHECKPOINTER). SQLite savers bind to the running
+    event loop, so call this from inside the loop that will run the graph.
+    """
+    kind = (kind or CHECKPOINTER).strip().lower()
+    path = path or CHECKPOINT_DB
+    if kind == "memory":
+        return InMemorySaver()
+    if kind == "sqlite":
+        return SqliteCheckpointer(path)
+    if kind == "sqlite-pool":
+        return SqliteCheckpointer(path, readers=max(1, CHECKPOINT_READERS))
+    raise ValueError(f"Unknown CHECKPOINTER '{kind}'. Use one of: memory, sqlite, sqlite-pool.")
@@ -0,0 +1,141 @@
+"""Context management: keep the prompt sent to the LLM within a token budget."""
+
+import json
+import logging
+import os
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, RemoveMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
+
+from app.graph.state import BuilderState
+
+logger = logging.getLogger(__name__)
+
+# Approximate prompt budget (tokens) for the conversation part of the prompt; override per run with
+# config["configurable"]["context_token_budget"].
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("CONTEXT_TOKEN_BUDGET", "6000"))
+
+# Stale tool outputs shorter than this are left alone.
+STALE_TOOL_OUTPUT_CHARS = 200
+# Per-message character caps used when folding old turns into the summary.
+SUMMARY_USER_CHARS = 200
+SUMMARY_ASSISTANT_CHARS = 300
+
+
+def _message_chars(messages: list[BaseMessage]) -> int:
+    chars = 0
+    for m in messages:
+        chars += len(m.content) if isinstance(m.content, str) else len(json.dumps(m.content))
+        tool_calls = getattr(m, "tool_calls", None)
+        if tool_calls:
+            chars += len(json.dumps(tool_calls, default=str))
+    return chars
+
+
+def estimate_tokens(messages: list[BaseMessage], summary: str = "") -> int:
+    """Cheap token estimate (~4 chars per token plus per-message overhead); no tokenizer round trip."""
+    return (len(summary) + _message_chars(messages)) // 4 + 4 * len(messages)
+
+
+def _fit_summary(summary: str, messages: list[BaseMessage], budget: int) -> str:
+    """The newest lines of summary that fit in budget next to messages (oldest lines dropped first)."""
+    # Largest summary length with estimate_tokens(messages, summary) <= budget
+    room = (budget - 4 * len(messages) + 1) * 4 - 1 - _message_chars(messages)
+    lines = summary.split("\n")
+    kept, size = [], -1
+    for line in reversed(lines):
+        if size + 1 + len(line) > room:
+            break
+        kept.append(line)
+        size += 1 + len(line)
+    return "\n".join(reversed(kept))
+
+
+def _last_human_index(messages: list[BaseMessage]) -> int:
+    for i in range(len(messages) - 1, -1, -1):
+        if isinstance(messages[i], HumanMessage):
+            return i
+    return 0
+
+
+def _compress_tool_output(m: ToolMessage) -> ToolMessage:
+    content = m.content if isinstance(m.content, str) else json.dumps(m.content)
+    try:
+        data = json.loads(content)
+    except ValueError:
+        data = None
+    if isinstance(data, list):
+        note = f"[earlier tool result omitted: {len(data)} parts]"
+    elif isinstance(data, dict) and "total" in data:
+        note = f"[earlier build total omitted: total ${data.get('total')}; see latest build]"
+    else:
+        note = "[earlier tool result omitted]"
+    return ToolMessage(content=note, tool_call_id=m.tool_call_id, id=m.id, name=m.name)
+
+
+def _summarize_turn(messages: list[BaseMessage]) -> list[str]:
+    lines = []
+    for m in messages:
+        text = m.content if isinstance(m.content, str) else ""
+        if isinstance(m, HumanMessage):
+            lines.append(f"User: {text[:SUMMARY_USER_CHARS]}")
+        elif isinstance(m, AIMessage) and text and not m.tool_calls:
+            lines.append(f"Assistant: {text[:SUMMARY_ASSISTANT_CHARS]}")
+    return lines
+
+
+def context_node(state: BuilderState, config: RunnableConfig):
+    """
+    Enforce the context token budget before each LLM call.
+    Over budget, stale tool outputs (from earlier turns) are compressed first; if that is not enough,
+    the oldest whole turns are folded into state["summary"] and removed from messages, and finally the
+    oldest summary lines are dropped until the summary fits too. The current turn is never touched, so
+    only a current turn over budget by itself leaves context_tokens_after above the budget. The latest
+    build lives in state and is re-injected by llm_node.
+    """
+    configurable = (config or {}).get("configurable") or {}
+    budget = int(configurable.get("context_token_budget") or CONTEXT_TOKEN_BUDGET)
+    messages = list(state.get("messages") or [])
+    summary = state.get("summary") or ""
+
+    before = estimate_tokens(messages, summary)
+    if before <= budget:
+        return {"context_tokens_before": before, "context_tokens_after": before}
+
+    updates: list[BaseMessage] = []
+    current = _last_human_index(messages)
+
+    # 1. Compress stale tool outputs (replacing by id keeps tool_call pairing intact)
+    for i in range(current):
+        m = messages[i]
+        if isinstance(m, ToolMessage) and len(str(m.content)) > STALE_TOOL_OUTPUT_CHARS:
+            messages[i] = _compress_tool_output(m)
+            updates.append(messages[i])
+    after = estimate_tokens(messages, summary)
+
+    # 2. Fold the oldest whole turns into the running summary
+    folded: list[str] = []
+    start = 0
+    while after > budget and start < current:
+        end = start + 1
+        while end < current and not isinstance(messages[end], HumanMessage):
+            end += 1
+        turn = messages[start:end]
+        folded.extend(_summarize_turn(turn))
+        updates.extend(RemoveMessage(id=m.id) for m in turn)
+        start = end
+        after = estimate_tokens(messages[start:], "\n".join([summary, *folded]))
+
+    # 3. Drop the oldest summary lines while the summary itself overflows the budget
+    new_summary = "\n".join(filter(None, [summary, *folded]))
+    if after > budget and new_summary:
+        new_summary = _fit_summary(new_summary, messages[start:], budget)
+        after = estimate_tokens(messages[start:], new_summary)
+
+    result: dict = {"messages": updates, "context_tokens_before": before, "context_tokens_after": after}
+    if new_summary != summary:
+        result["summary"] = new_summary
+    if after > budget:
+        logger.warning("current turn alone is ~%d tokens, over the context budget of %d", after, budget)
+    logger.debug("context trimmed from ~%d to ~%d tokens (budget %d)", before, after, budget)
+    return result
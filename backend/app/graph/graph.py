@@ -1,31 +1,33 @@
 """Compile the PC builder agent graph with optional persistence."""
 
-import os
-import sqlite3
-
-from langgraph.checkpoint.sqlite import SqliteSaver
 from langgraph.graph import END, START, StateGraph
 
+from app.graph.checkpoint import create_checkpointer
+from app.graph.context import context_node
 from app.graph.nodes import llm_node, should_continue, tool_node
 from app.graph.state import BuilderState
+from app.metrics import timed_node
 
 
 def compile_graph(use_checkpointer: bool = True):
-    """Build and compile the agent graph. Optionally use SQLite checkpointer for persistence."""
+    """
+    Build and compile the agent graph. Optionally persist threads with the checkpointer chosen by
+    CHECKPOINTER (see app.graph.checkpoint). Nodes are async, so run the graph with ainvoke/astream.
+    With a checkpointer this must be called from inside the event loop that will run the graph (the
+    SQLite savers bind to the running loop).
+    """
     builder = StateGraph(BuilderState)
 
-    builder.add_node("llm", llm_node)
-    builder.add_node("tools", tool_node)
+    builder.add_node("context", timed_node("context", context_node))
+    builder.add_node("llm", timed_node("llm", llm_node))
+    builder.add_node("tools", timed_node("tools", tool_node))
 
-    builder.add_edge(START, "llm")
+    # Every LLM call goes through the context stage so the prompt stays within budget
+    builder.add_edge(START, "context")
+    builder.add_edge("context", "llm")
     builder.add_conditional_edges("llm", should_continue, ["tools", END])
-    builder.add_edge("tools", "llm")
+    builder.add_edge("tools", "context")
 
     if use_checkpointer:
-        conn = sqlite3.connect(
-            os.environ.get("CHECKPOINT_DB", "checkpoints.sqlite"),
-            check_same_thread=False,
-        )
-        checkpointer = SqliteSaver(conn)
-        return builder.compile(checkpointer=checkpointer)
+        return builder.compile(checkpointer=create_checkpointer())
     return builder.compile()
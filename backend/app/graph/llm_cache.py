@@ -0,0 +1,289 @@
+"""Opt-in response cache for the model call in llm_node (LLM_CACHE=1)."""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from langchain_core.messages import AIMessage, BaseMessage, messages_from_dict, messages_to_dict
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from app.metrics import Collected, register
+
+LLM_CACHE = os.environ.get("LLM_CACHE", "").lower() in ("1", "true", "yes")
+# Entries kept in memory (least recently used are evicted first)
+LLM_CACHE_SIZE = int(os.environ.get("LLM_CACHE_SIZE", "1024"))
+# Seconds an entry stays valid in either tier
+LLM_CACHE_TTL = float(os.environ.get("LLM_CACHE_TTL", "86400"))
+# Directory for the on-disk tier (shared by workers and kept across restarts); unset = memory only
+LLM_CACHE_DIR = os.environ.get("LLM_CACHE_DIR") or None
+# Size limit of the on-disk tier; pruning removes expired files, then the oldest until under it
+LLM_CACHE_DIR_MAX_BYTES = int(os.environ.get("LLM_CACHE_DIR_MAX_BYTES", str(256 * 1024 * 1024)))
+# Minimum seconds between disk-tier prunes (run after a write)
+LLM_CACHE_PRUNE_INTERVAL = float(os.environ.get("LLM_CACHE_PRUNE_INTERVAL", "300"))
+# Temp files older than this are left over from a crashed write
+_STALE_TMP_SECONDS = 3600
+
+
+def _normalize(messages: list[BaseMessage]) -> list[dict]:
+    """
+    Stable representation of the prompt: message ids are dropped and tool call ids are renumbered by
+    position, so two sessions that said the same things hash the same.
+    """
+    call_ids: dict[str, str] = {}
+    out = []
+    for m in messages:
+        item: dict = {"type": m.type, "content": m.content}
+        if isinstance(m, AIMessage) and m.tool_calls:
+            item["tool_calls"] = [
+                {"name": tc["name"], "args": tc.get("args") or {}, "id": call_ids.setdefault(tc["id"], f"c{len(call_ids)}")}
+                for tc in m.tool_calls
+            ]
+        if getattr(m, "tool_call_id", None):
+            item["tool_call_id"] = call_ids.get(m.tool_call_id, m.tool_call_id)
+        out.append(item)
+    return out
+
+
+def tools_digest(tools: list) -> str:
+    """Hash of the tool schemas the model is bound to (compute once per process)."""
+    schemas = [convert_to_openai_tool(t) for t in tools]
+    return hashlib.sha256(json.dumps(schemas, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def cache_key(messages: list[BaseMessage], tools: str, catalog_version: int, model: str = "") -> str:
+    """
+    Hash of model, tool schemas (tools_digest), catalog version and the normalized prompt (system
+    message included). A catalog refresh changes the version, so answers that depended on old tool
+    output stop matching.
+    """
+    payload = json.dumps(
+        [model, tools, catalog_version, _normalize(messages)],
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _fresh(message: AIMessage) -> AIMessage:
+    # A cached answer must not reuse the message id or tool call ids of the conversation it came from
+    tool_calls = [{**tc, "id": f"call_{uuid.uuid4().hex[:24]}"} for tc in message.tool_calls]
+    return message.model_copy(update={"id": f"run-{uuid.uuid4()}", "tool_calls": tool_calls})
+
+
+class LLMCache:
+    """
+    Two-tier (memory LRU + optional directory of JSON files) cache of model responses with a TTL. The
+    disk tier is pruned at most every prune_interval seconds: expired files go first, then the oldest
+    files until the directory is under max_disk_bytes.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = LLM_CACHE_SIZE,
+        ttl: float = LLM_CACHE_TTL,
+        directory: str | None = LLM_CACHE_DIR,
+        max_disk_bytes: int = LLM_CACHE_DIR_MAX_BYTES,
+        prune_interval: float = LLM_CACHE_PRUNE_INTERVAL,
+    ) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.prune_interval = prune_interval
+        self._entries: OrderedDict[str, tuple[float, AIMessage]] = OrderedDict()  # key -> (expires_at, response)
+        self._lock = threading.Lock()
+        self._next_prune = 0.0  # time.monotonic() of the next disk prune
+        self.hits = self.disk_hits = self.misses = self.evictions = 0
+        self.disk_evictions = self.disk_expired = 0
+        self.disk_bytes = 0  # size of the disk tier at the last prune
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _remember(self, key: str, expires_at: float, message: AIMessage) -> None:
+        with self._lock:
+            self._entries[key] = (expires_at, message)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _read_disk(self, key: str) -> tuple[float, dict] | None:
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry["expires_at"] <= time.time():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return entry["expires_at"], entry["message"]
+
+    def _write_disk(self, key: str, expires_at: float, data: dict) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"expires_at": expires_at, "message": data}, f)
+        os.replace(tmp, path)  # atomic, so concurrent workers never read a partial file
+
+    def prune_disk(self) -> int:
+        """
+        Remove expired files, then the oldest until the disk tier fits max_disk_bytes; returns the number
+        of files removed. A file expires ttl seconds after it was written (its mtime), the same time as the
+        expires_at it holds. Safe to run from several workers at once.
+        """
+        if not self.directory:
+            return 0
+        now = time.time()
+        files: list[tuple[float, int, str]] = []  # (mtime, size, path) of live entries
+        expired: list[str] = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                if name.endswith(".tmp"):
+                    if st.st_mtime + _STALE_TMP_SECONDS <= now:
+                        expired.append(path)
+                elif name.endswith(".json"):
+                    if st.st_mtime + self.ttl <= now:
+                        expired.append(path)
+                    else:
+                        files.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in files)
+        evicted = []
+        files.sort()
+        for _, size, path in files:
+            if total <= self.max_disk_bytes:
+                break
+            evicted.append(path)
+            total -= size
+        removed = 0
+        for path in expired + evicted:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass  # another worker got there first
+        with self._lock:
+            self.disk_expired += len(expired)
+            self.disk_evictions += len(evicted)
+            self.disk_bytes = total
+        return removed
+
+    async def _maybe_prune(self) -> None:
+        now = time.monotonic()
+        if now < self._next_prune:
+            return
+        self._next_prune = now + self.prune_interval
+        await asyncio.to_thread(self.prune_disk)
+
+    def get_memory(self, key: str) -> AIMessage | None:
+        """Memory-tier lookup only (no I/O)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.time():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return _fresh(entry[1])
+
+    async def aget(self, key: str) -> AIMessage | None:
+        """Cached response for key, or None. Disk hits are promoted to memory."""
+        message = self.get_memory(key)
+        if message is not None:
+            return message
+        if self.directory:
+            entry = await asyncio.to_thread(self._read_disk, key)
+            if entry is not None:
+                expires_at, message = entry[0], messages_from_dict([entry[1]])[0]
+                self._remember(key, expires_at, message)
+                self.disk_hits += 1
+                return _fresh(message)
+        self.misses += 1
+        return None
+
+    async def aset(self, key: str, message: AIMessage) -> None:
+        """Store a model response under key in both tiers."""
+        expires_at = time.time() + self.ttl
+        self._remember(key, expires_at, message)
+        if self.directory:
+            await asyncio.to_thread(self._write_disk, key, expires_at, messages_to_dict([message])[0])
+            await self._maybe_prune()
+
+    def clear(self) -> None:
+        """Drop the memory tier (the disk tier expires by TTL and is pruned by prune_disk)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters, memory-tier size and disk-tier evictions and size (as of the last prune)."""
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "disk_evictions": self.disk_evictions,
+            "disk_expired": self.disk_expired,
+            "disk_bytes": self.disk_bytes,
+            "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+
+_cache: LLMCache | None = None
+
+
+def get_llm_cache() -> LLMCache | None:
+    """The process-wide cache, or None when LLM_CACHE is off."""
+    global _cache
+    if not LLM_CACHE:
+        return None
+    if _cache is None:
+        _cache = LLMCache()
+    return _cache
+
+
+def _collect(**fields: str):
+    # (labels, value) pairs from the process-wide cache's stats(): label value -> stats field, or a single
+    # unlabeled field passed as value=...; nothing while the cache is off or not yet used
+    def collect():
+        if _cache is None:
+            return []
+        stats = _cache.stats()
+        if list(fields) == ["value"]:
+            return [((), stats[fields["value"]])]
+        return [((label,), stats[field]) for label, field in fields.items()]
+    return collect
+
+
+register(Collected(
+    "llm_cache_lookups_total", "LLM response cache lookups by result.", "counter", ("result",),
+    _collect(hit="hits", disk_hit="disk_hits", miss="misses"),
+))
+register(Collected(
+    "llm_cache_evictions_total", "LLM response cache entries removed, by reason.", "counter", ("reason",),
+    _collect(memory_lru="evictions", disk_size="disk_evictions", disk_expired="disk_expired"),
+))
+register(Collected("llm_cache_entries", "LLM response cache entries held in memory.", "gauge", (), _collect(value="size")))
+register(Collected(
+    "llm_cache_disk_bytes", "Size of the LLM response cache directory at the last prune.", "gauge", (),
+    _collect(value="disk_bytes"),
+))
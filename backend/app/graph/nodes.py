@@ -1,108 +1,312 @@
 """Graph nodes: LLM with tools and tool execution."""
 
+import asyncio
+import json
+import os
+import time
+from functools import lru_cache
 from typing import Literal
 
+import httpx
 from langchain_core.messages import SystemMessage, ToolMessage
 from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables.config import patch_config
+from langchain_core.tools import tool
 from langchain_openai import ChatOpenAI
-from sqlalchemy.orm import Session
+from langgraph.graph import END
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.db import AsyncSessionLocal
+from app.db.catalog import get_catalog
+from app.graph.llm_cache import cache_key, get_llm_cache, tools_digest
 from app.graph.state import BuilderState
-from app.tools.build import get_build_total
-from app.tools.parts import search_parts as search_parts_impl
+from app.metrics import LLM_TOKENS, TOOL_ERRORS, TOOL_LATENCY
+from app.tools.build import get_build_total as get_build_total_impl, get_tax_rate
+from app.tools.memo import search_args, tool_memo
+from app.tools.optimize import optimize_build as optimize_build_impl
+from app.tools.parts import (
+    compatible_parts as compatible_parts_impl,
+    search_parts as search_parts_impl,
+)
+from app.tools.recommend import recommended_build
 
 SYSTEM_PROMPT = """You are a helpful PC building assistant. Have a natural conversation—don't run through a fixed list of questions. React to what the user says and only ask for details when you need them (e.g. budget, what they'll use the PC for, or state/region for tax). If they volunteer several things at once (e.g. "I have $1500 for gaming in California"), use that and suggest a build when you have enough.
 
 You have tools:
-- search_parts(category, max_price?): look up parts from our catalog. Categories: CPU, CPU Cooler, Motherboard, Memory, Storage, GPU, Case, Power Supply.
-- get_build_total(part_ids, region): get subtotal, tax, and total for part IDs and a US state/region.
+- search_parts(category, max_price?, compatible_with?): look up parts from our catalog. Categories: CPU, CPU Cooler, Motherboard, Memory, Storage, GPU, Case, Power Supply. compatible_with is a list of part IDs the results must be compatible with.
+- compatible_parts(part_id, category, max_price?): parts in category that are compatible with part_id (CPU socket/motherboard, DDR generation/memory, cooler socket support, GPU/PSU wattage).
+- get_build_total(part_ids, region): get subtotal, tax, and total for part IDs and a US state or ZIP code.
+- optimize_build(budget, region, use_case?, include_os?, pinned_part_ids?): pick a complete build (one part per category) that fits the budget after tax. use_case is one of gaming, workstation, streaming, general.
 
-When suggesting a build: use search_parts for each category with max prices that fit the budget (reserve ~$120 for Windows if they want an OS), then get_build_total with their state. Present parts and total clearly. If they want changes (different GPU, more storage, etc.), call the tools again. Be concise and friendly."""
+When suggesting a build: once you know the budget and state, call optimize_build first—it returns the parts and totals in one step (it reserves ~$120 for Windows unless include_os is false). Pin parts the user insists on with pinned_part_ids. Use search_parts and get_build_total for targeted changes or when the user asks to compare specific parts. Present parts and total clearly. If they want changes (different GPU, more storage, etc.), call the tools again. Be concise and friendly."""
 
 
-def create_llm(model: str = "gpt-4o-mini"):
-    return ChatOpenAI(model=model, temperature=0)
+# Shared keep-alive connection pool for all OpenAI calls in this process
+OPENAI_MAX_CONNECTIONS = int(os.environ.get("OPENAI_MAX_CONNECTIONS", "100"))
+OPENAI_MAX_KEEPALIVE = int(os.environ.get("OPENAI_MAX_KEEPALIVE", "20"))
 
+# Max tool calls from one model message that run at the same time
+TOOL_CONCURRENCY = int(os.environ.get("TOOL_CONCURRENCY", "8"))
 
-def make_tools(db: Session):
-    """Build tools that close over the db session for this request."""
+_http_client: httpx.AsyncClient | None = None
 
-    def search_parts_tool(category: str, max_price: float | None = None, limit: int = 10) -> str:
-        """Search for PC parts by category. max_price is optional (USD). Returns a list of parts with id, name, price_usd, link."""
-        import json
-        parts = search_parts_impl(db, category=category, max_price=max_price, limit=limit)
-        return json.dumps([{"id": p["id"], "name": p["name"], "price_usd": p["price_usd"], "link": p.get("link")} for p in parts])
 
-    def get_build_total_tool(part_ids: list[str], region: str) -> str:
-        """Compute subtotal, tax rate, and total for a list of part IDs (from search_parts) and a US state or region (e.g. CA or California)."""
-        import json
-        result = get_build_total(db, part_ids=part_ids, region=region)
-        return json.dumps({"subtotal": result["subtotal"], "tax_rate": result["tax_rate"], "total": result["total"], "parts": result["parts"]})
+def get_http_client() -> httpx.AsyncClient:
+    """Process-wide pooled HTTP client reused by every model call (no TLS handshake per request)."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=OPENAI_MAX_KEEPALIVE,
+                keepalive_expiry=60.0,
+            ),
+            timeout=httpx.Timeout(60.0, connect=10.0),
+        )
+    return _http_client
 
-    from langchain_core.tools import tool
 
-    @tool
-    def search_parts(category: str, max_price: float | None = None, limit: int = 10) -> str:
-        """Search for PC parts by category. category must be one of: CPU, CPU Cooler, Motherboard, Memory, Storage, GPU, Case, Power Supply. max_price is optional (USD)."""
-        return search_parts_tool(category, max_price, limit)
+async def close_http_client() -> None:
+    """Close the shared HTTP client (app shutdown); the next get_llm() builds a model on a new one."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+    get_llm.cache_clear()
 
-    @tool
-    def get_build_total(part_ids: list[str], region: str) -> str:
-        """Compute subtotal, tax rate, and total for a list of part IDs and a US state/region (e.g. CA or California)."""
-        return get_build_total_tool(part_ids, region)
 
-    return [search_parts, get_build_total]
+def create_llm(model: str = "gpt-4o-mini"):
+    return ChatOpenAI(model=model, temperature=0, http_async_client=get_http_client())
 
 
-def _get_db(config: RunnableConfig) -> Session:
+def _get_db(config: RunnableConfig) -> AsyncSession:
     db = (config or {}).get("configurable", {}).get("db")
     if db is None:
         raise ValueError("config['configurable']['db'] is required")
     return db
 
 
-def llm_node(state: BuilderState, config: RunnableConfig):
-    """Invoke LLM with tools; append response to messages."""
+# Tools are defined once per process; the request's DB session arrives via the injected RunnableConfig
+# (config["configurable"]["db"]), which is hidden from the tool schema sent to the model.
+
+
+def _parts_json(parts: list[dict]) -> str:
+    return json.dumps([{"id": p["id"], "name": p["name"], "price_usd": p["price_usd"], "link": p.get("link")} for p in parts])
+
+
+@tool
+async def search_parts(
+    category: str,
+    max_price: float | None = None,
+    limit: int = 10,
+    compatible_with: list[str] | None = None,
+    *,
+    config: RunnableConfig,
+) -> str:
+    """Search for PC parts by category. category must be one of: CPU, CPU Cooler, Motherboard, Memory, Storage, GPU, Case, Power Supply. max_price is optional (USD). compatible_with is an optional list of part IDs the results must be compatible with."""
     db = _get_db(config)
-    tools = make_tools(db)
-    llm = create_llm().bind_tools(tools)
+
+    async def compute() -> str:
+        parts = await search_parts_impl(
+            db, category=category, max_price=max_price, limit=limit, compatible_with=compatible_with
+        )
+        return _parts_json(parts)
+
+    return await tool_memo.get_or_compute(
+        db, "search_parts", search_args(category, max_price, limit, compatible_with), compute
+    )
+
+
+@tool
+async def compatible_parts(
+    part_id: str, category: str, max_price: float | None = None, limit: int = 10, *, config: RunnableConfig
+) -> str:
+    """List parts in category (CPU, CPU Cooler, Motherboard, Memory, Storage, GPU, Case, Power Supply) that are compatible with part_id: CPU socket and motherboard, DDR generation and memory, cooler socket support, GPU power and PSU wattage. max_price is optional (USD)."""
+    try:
+        parts = await compatible_parts_impl(_get_db(config), part_id, category, max_price=max_price, limit=limit)
+    except ValueError as e:
+        return json.dumps({"error": str(e)})
+    return _parts_json(parts)
+
+
+@tool
+async def get_build_total(part_ids: list[str], region: str, *, config: RunnableConfig) -> str:
+    """Compute subtotal, tax rate, and total for a list of part IDs and a US state, state name or ZIP code (e.g. CA, California or 94103). Unknown IDs are listed in unknown_ids and excluded from the total."""
+    db = _get_db(config)
+
+    async def compute() -> str:
+        result = await get_build_total_impl(db, part_ids=part_ids, region=region)
+        return json.dumps(
+            {
+                "subtotal": result["subtotal"],
+                "tax_rate": result["tax_rate"],
+                "total": result["total"],
+                "parts": result["parts"],
+                "unknown_ids": result["unknown_ids"],
+            }
+        )
+
+    # Keyed on the resolved tax rate, so "CA" and "California" share an entry
+    return await tool_memo.get_or_compute(
+        db, "get_build_total", (tuple(part_ids), get_tax_rate(region)), compute
+    )
+
+
+@tool
+async def optimize_build(
+    budget: float,
+    region: str,
+    use_case: str = "gaming",
+    include_os: bool = True,
+    pinned_part_ids: list[str] | None = None,
+    *,
+    config: RunnableConfig,
+) -> str:
+    """Pick one part per category (CPU, CPU Cooler, Motherboard, Memory, Storage, GPU, Case, Power Supply) with the best value the optimizer finds for use_case (gaming, workstation, streaming, general) with the total after tax for region (US state or ZIP code, e.g. CA or 94103) within budget (USD). include_os reserves $119.99 for Windows. pinned_part_ids keeps specific parts (from search_parts). Returns parts, subtotal, tax_rate, total and total_with_os, or an error."""
+    db = _get_db(config)
+    # Common brackets are answered from the table precomputed at catalog refresh
+    result = None if pinned_part_ids else await recommended_build(db, budget, region, use_case, include_os)
+    result = result or await optimize_build_impl(
+        db,
+        budget=budget,
+        region=region,
+        use_case=use_case,
+        include_os=include_os,
+        pinned_part_ids=pinned_part_ids,
+    )
+    return json.dumps(result)
+
+
+# Tools whose output is a full build (parts + totals); tool_node saves it for the session
+BUILD_RESULT_TOOLS = {"get_build_total", "optimize_build"}
+
+TOOLS = [search_parts, compatible_parts, get_build_total, optimize_build]
+TOOLS_BY_NAME = {t.name: t for t in TOOLS}
+
+
+@lru_cache(maxsize=1)
+def get_llm():
+    """Model with tool schemas bound, built once per process."""
+    return create_llm().bind_tools(TOOLS)
+
+
+@lru_cache(maxsize=1)
+def _tools_digest() -> str:
+    return tools_digest(TOOLS)
+
+
+def _system_message(state: BuilderState) -> SystemMessage:
+    """System prompt plus the running summary and latest build kept outside the message list."""
+    content = SYSTEM_PROMPT
+    summary = state.get("summary")
+    if summary:
+        content += f"\n\nSummary of earlier conversation:\n{summary}"
+    build_total = state.get("build_total")
+    if build_total:
+        content += "\n\nLatest build (from get_build_total):\n" + json.dumps(
+            {**build_total, "parts": state.get("current_build") or []}
+        )
+    return SystemMessage(content=content)
+
+
+async def llm_node(state: BuilderState, config: RunnableConfig):
+    """
+    Invoke LLM with tools; append response to messages. With LLM_CACHE on, identical prompts (same
+    system message, history, tool schemas and catalog version) are answered from the response cache.
+    """
+    llm = get_llm()
 
     messages = state["messages"]
     if not messages or not isinstance(messages[0], SystemMessage):
-        messages = [SystemMessage(content=SYSTEM_PROMPT)] + list(messages)
+        messages = [_system_message(state)] + list(messages)
+
+    cache = get_llm_cache()
+    if cache is None:
+        return {"messages": [await _call_llm(llm, messages)]}
 
-    response = llm.invoke(messages)
+    catalog = await get_catalog(_get_db(config))
+    model = getattr(getattr(llm, "bound", None), "model_name", "")
+    key = cache_key(messages, _tools_digest(), catalog.version, model)
+    response = await cache.aget(key)
+    if response is None:
+        response = await _call_llm(llm, messages)
+        await cache.aset(key, response)
     return {"messages": [response]}
 
 
-def tool_node(state: BuilderState, config: RunnableConfig):
-    """Execute tool calls from the last message and return ToolMessages. Persist build when get_build_total is used."""
-    import json
+async def _call_llm(llm, messages: list):
+    response = await llm.ainvoke(messages)
+    usage = getattr(response, "usage_metadata", None)
+    if usage:
+        LLM_TOKENS.observe(usage.get("input_tokens", 0), "in")
+        LLM_TOKENS.observe(usage.get("output_tokens", 0), "out")
+    return response
+
+
+async def _invoke_tool(tool_, args: dict, config: RunnableConfig) -> str:
+    start = time.perf_counter()
+    try:
+        return await tool_.ainvoke(args, config=config)
+    except Exception:
+        TOOL_ERRORS.inc(tool_.name)
+        raise
+    finally:
+        TOOL_LATENCY.observe(time.perf_counter() - start, tool_.name)
+
+
+async def _run_tool_calls(tool_calls: list[dict], config: RunnableConfig) -> list[str | None]:
+    """
+    Run tool calls concurrently (bounded by TOOL_CONCURRENCY) and return outputs in call order (None for
+    unknown tools). An AsyncSession must not be shared between concurrent tasks, so with more than one
+    call each task gets its own session; a single call reuses the request's session.
+    """
+    if len(tool_calls) == 1:
+        tool_ = TOOLS_BY_NAME.get(tool_calls[0]["name"])
+        return [await _invoke_tool(tool_, tool_calls[0].get("args") or {}, config) if tool_ else None]
+
+    configurable = (config or {}).get("configurable") or {}
+    semaphore = asyncio.Semaphore(TOOL_CONCURRENCY)
+
+    async def run(tc: dict) -> str | None:
+        tool_ = TOOLS_BY_NAME.get(tc["name"])
+        if tool_ is None:
+            return None
+        async with semaphore, AsyncSessionLocal() as task_db:
+            task_config = patch_config(config, configurable={**configurable, "db": task_db})
+            return await _invoke_tool(tool_, tc.get("args") or {}, task_config)
+
+    return list(await asyncio.gather(*(run(tc) for tc in tool_calls)))
+
+
+async def tool_node(state: BuilderState, config: RunnableConfig):
+    """Execute tool calls from the last message and return ToolMessages. Persist build when a build tool (get_build_total, optimize_build) is used."""
     db = _get_db(config)
     configurable = (config or {}).get("configurable") or {}
     thread_id = configurable.get("thread_id")
 
-    tools = make_tools(db)
-    tools_by_name = {t.name: t for t in tools}
-
     messages = state["messages"]
     last = messages[-1]
     if not hasattr(last, "tool_calls") or not last.tool_calls:
         return {"messages": []}
 
+    outputs = await _run_tool_calls(last.tool_calls, config)
+
+    # Post-process sequentially, in call order, on the request session
     result = []
-    for tc in last.tool_calls:
+    update: dict = {}
+    for tc, out in zip(last.tool_calls, outputs, strict=True):
         name = tc["name"]
-        args = tc.get("args") or {}
-        tool = tools_by_name.get(name)
-        if tool:
-            out = tool.invoke(args)
+        if out is not None:
             result.append(ToolMessage(content=str(out), tool_call_id=tc["id"]))
-            if name == "get_build_total" and thread_id:
+            if name in BUILD_RESULT_TOOLS and thread_id:
                 try:
                     data = json.loads(out)
+                    if "error" in data:
+                        continue
+                    update["current_build"] = data.get("parts") or []
+                    update["build_total"] = {k: data.get(k) for k in ("subtotal", "tax_rate", "total")}
                     from app.db.sessions import create_build
-                    create_build(
+                    await create_build(
                         db,
                         session_id=thread_id,
                         parts=data.get("parts") or [],
@@ -114,15 +318,15 @@ def tool_node(state: BuilderState, config: RunnableConfig):
                     pass
         else:
             result.append(ToolMessage(content=f"Unknown tool: {name}", tool_call_id=tc["id"]))
-    return {"messages": result}
+    return {"messages": result, **update}
 
 
-def should_continue(state: BuilderState) -> Literal["tools", "end"]:
+def should_continue(state: BuilderState) -> Literal["tools", "__end__"]:
     """Route to tools if last message has tool_calls, else end."""
     messages = state["messages"]
     if not messages:
-        return "end"
+        return END
     last = messages[-1]
     if hasattr(last, "tool_calls") and last.tool_calls:
         return "tools"
-    return "end"
+    return END
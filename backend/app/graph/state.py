@@ -1,6 +1,6 @@
 """Graph state for the PC builder agent."""
 
-from typing import Annotated, Literal, TypedDict
+from typing import Annotated, TypedDict
 
 from langgraph.graph.message import add_messages
 
@@ -14,3 +14,6 @@ class BuilderState(TypedDict, total=False):
     region: str
     current_build: list[dict]  # part snapshots
     build_total: dict  # subtotal, tax_rate, total
+    summary: str  # running summary of turns folded out of messages
+    context_tokens_before: int  # estimated prompt tokens before trimming (last context pass)
+    context_tokens_after: int  # estimated prompt tokens after trimming
@@ -9,9 +9,15 @@ from fastapi import FastAPI
 # __file__ = backend/app/main.py -> parent.parent = backend, parent.parent.parent = project root
 load_dotenv(Path(__file__).resolve().parent.parent.parent / ".env")
 
-from app.api.chat import router as chat_router
-from app.db import init_db
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import event
+
+from app.api.chat import close_graph, router as chat_router
+from app.db import async_engine, init_db
+from app.graph.nodes import close_http_client
+from app.metrics import MetricsMiddleware, count_sql, render as render_metrics
+from app.tools.batch import shutdown_batch_pool
 
 app = FastAPI(title="PC Builder API", version="2.0.0")
 
@@ -22,6 +28,10 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
+
+# Count SQL statements per request (see app.metrics)
+event.listen(async_engine.sync_engine, "before_cursor_execute", count_sql)
 
 
 @app.on_event("startup")
@@ -29,9 +39,22 @@ def startup():
     init_db()
 
 
+@app.on_event("shutdown")
+async def shutdown():
+    await close_http_client()
+    await close_graph()
+    shutdown_batch_pool()
+
+
 app.include_router(chat_router)
 
 
 @app.get("/health")
 def health():
     return {"status": "ok"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus text-format metrics for this worker."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
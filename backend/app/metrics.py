@@ -0,0 +1,215 @@
+"""
+In-process metrics rendered in the Prometheus text format (GET /metrics).
+
+Observations are a bisect plus two additions under an uncontended lock, so instrumentation stays on under
+load. Values are per worker process; scrape each worker (or run one worker per port) as usual.
+"""
+
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+from contextlib import contextmanager
+from functools import wraps
+from inspect import iscoroutinefunction
+
+# Bucket upper bounds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+COUNT_BUCKETS = (1, 2, 3, 4, 5, 6, 8, 10, 15, 20, 30, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+TOKEN_BUCKETS = (16, 64, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple[str, ...], values: tuple) -> str:
+    return ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values, strict=True))
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()) -> None:
+        self.name, self.help, self.label_names = name, help, labels
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            lbl = _labels(self.label_names, labels)
+            yield f"{self.name}{{{lbl}}} {value}" if lbl else f"{self.name} {value}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels."""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (), buckets: tuple = LATENCY_BUCKETS) -> None:
+        self.name, self.help, self.label_names = name, help, labels
+        self.buckets = tuple(buckets)
+        self._series: dict[tuple, list] = {}  # labels -> [per-bucket counts (+Inf last), sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels) -> None:
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, *labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+        for labels, counts, total in items:
+            lbl = _labels(self.label_names, labels)
+            sep = "," if lbl else ""
+            cumulative = 0
+            for bound, n in zip((*self.buckets, "+Inf"), counts, strict=True):
+                cumulative += n
+                yield f'{self.name}_bucket{{{lbl}{sep}le="{bound}"}} {cumulative}'
+            suffix = f"{{{lbl}}}" if lbl else ""
+            yield f"{self.name}_sum{suffix} {total}"
+            yield f"{self.name}_count{suffix} {cumulative}"
+
+
+class Collected:
+    """
+    Metric read from a callback at scrape time, for counts another component already keeps (cache hit
+    counters, sizes). collect returns (label values, value) pairs; kind is "counter" or "gauge".
+    """
+
+    def __init__(
+        self, name: str, help: str, kind: str, labels: tuple[str, ...], collect: Callable[[], Iterable[tuple[tuple, float]]]
+    ) -> None:
+        self.name, self.help, self.kind, self.label_names = name, help, kind, labels
+        self.collect = collect
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+        for labels, value in self.collect():
+            lbl = _labels(self.label_names, labels)
+            yield f"{self.name}{{{lbl}}} {value}" if lbl else f"{self.name} {value}"
+
+
+HTTP_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency by route (streamed responses: until the last chunk).", ("method", "route", "status"))
+HTTP_SQL_QUERIES = Histogram("http_request_sql_queries", "SQL statements executed per HTTP request.", ("route",), COUNT_BUCKETS)
+NODE_DURATION = Histogram("graph_node_duration_seconds", "Graph node execution time.", ("node",))
+GRAPH_LOOP_ITERATIONS = Histogram("graph_loop_iterations", "LLM calls (agent loop iterations) per chat turn.", (), COUNT_BUCKETS)
+TOOL_LATENCY = Histogram("tool_duration_seconds", "Tool call latency.", ("tool",))
+TOOL_ERRORS = Counter("tool_errors_total", "Tool calls that raised.", ("tool",))
+LLM_TOKENS = Histogram("llm_tokens", "Tokens per LLM call, as reported by the provider.", ("direction",), TOKEN_BUCKETS)
+LLM_TTFT = Histogram("llm_time_to_first_token_seconds", "Time from request start to the first streamed token.")
+CHECKPOINT_BYTES = Histogram("checkpoint_blob_bytes", "Serialized size of checkpoint blobs written by the checkpointer.", (), SIZE_BUCKETS)
+
+REGISTRY = [
+    HTTP_LATENCY, HTTP_SQL_QUERIES, NODE_DURATION, GRAPH_LOOP_ITERATIONS, TOOL_LATENCY, TOOL_ERRORS,
+    LLM_TOKENS, LLM_TTFT, CHECKPOINT_BYTES,
+]
+
+
+def register(metric):
+    """Add a metric defined elsewhere (e.g. next to the component it measures) to the /metrics output."""
+    REGISTRY.append(metric)
+    return metric
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
+
+
+class RequestStats:
+    """Per-request tallies shared with child tasks through a context variable."""
+
+    __slots__ = ("sql_queries", "llm_calls", "started")
+
+    def __init__(self) -> None:
+        self.sql_queries = 0
+        self.llm_calls = 0
+        self.started = time.perf_counter()
+
+
+request_stats: contextvars.ContextVar[RequestStats | None] = contextvars.ContextVar("request_stats", default=None)
+
+
+def count_sql(*_args) -> None:
+    """SQLAlchemy before_cursor_execute listener: count statements for the current request."""
+    stats = request_stats.get()
+    if stats is not None:
+        stats.sql_queries += 1
+
+
+def timed_node(name: str, fn: Callable) -> Callable:
+    """Wrap a graph node (sync or async, (state, config) signature) to record its duration."""
+    if iscoroutinefunction(fn):
+        @wraps(fn)
+        async def async_node(state, config):
+            if name == "llm" and (stats := request_stats.get()) is not None:
+                stats.llm_calls += 1
+            with NODE_DURATION.time(name):
+                return await fn(state, config)
+        return async_node
+
+    @wraps(fn)
+    def node(state, config):
+        with NODE_DURATION.time(name):
+            return fn(state, config)
+    return node
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware: request latency and SQL statements per route, and agent loop iterations per chat
+    turn. Pure ASGI (no BaseHTTPMiddleware), so streamed bodies run in the request's context and are timed
+    to the end.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = RequestStats()
+        token = request_stats.set(stats)
+        status = 500
+
+        async def send_with_status(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            request_stats.reset(token)
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            HTTP_LATENCY.observe(time.perf_counter() - stats.started, scope["method"], route, status)
+            HTTP_SQL_QUERIES.observe(stats.sql_queries, route)
+            if stats.llm_calls:
+                GRAPH_LOOP_ITERATIONS.observe(stats.llm_calls)
@@ -1,6 +1,7 @@
-"""Tools for the PC builder agent: part search, build total, replace part."""
+"""Tools for the PC builder agent: part search, build total, replace part, build optimizer."""
 
-from app.tools.build import get_build_total
-from app.tools.parts import search_parts
+from app.tools.build import get_build_total, get_build_totals
+from app.tools.optimize import optimize_build
+from app.tools.parts import compatible_parts, resolve_parts, search_parts
 
-__all__ = ["search_parts", "get_build_total"]
+__all__ = ["search_parts", "compatible_parts", "resolve_parts", "get_build_total", "get_build_totals", "optimize_build"]
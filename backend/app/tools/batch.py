@@ -0,0 +1,137 @@
+"""Batch build generation without the LLM: optimize many (budget, region, use case) specs on a process pool."""
+
+import asyncio
+import multiprocessing
+import os
+from collections.abc import AsyncIterator, Iterable, Iterator
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.catalog import CatalogSnapshot, get_catalog, load_catalog
+from app.tools.build import get_tax_rate
+from app.tools.optimize import USE_CASE_WEIGHTS, optimize
+
+# Worker processes for batch builds (default: one per core) and specs per unit of work sent to a worker
+BATCH_WORKERS = int(os.environ.get("BATCH_WORKERS", "0")) or os.cpu_count() or 1
+BATCH_CHUNK_SIZE = int(os.environ.get("BATCH_CHUNK_SIZE", "50"))
+
+# Per-process catalog used by pool workers (loaded on first chunk, reloaded when a chunk asks for a newer version)
+_worker_catalog: CatalogSnapshot | None = None
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def build_for_spec(catalog: CatalogSnapshot, spec: dict) -> dict:
+    """One build for spec (budget, region, use_case?, include_os?, pinned_part_ids?), as an NDJSON-ready dict."""
+    try:
+        budget = float(spec["budget"])
+        region = str(spec.get("region") or "")
+    except (KeyError, TypeError, ValueError):
+        return {"error": "spec needs a numeric budget"}
+    result = optimize(
+        catalog,
+        budget=budget,
+        tax_rate=get_tax_rate(region),
+        use_case=spec.get("use_case") or "gaming",
+        include_os=bool(spec.get("include_os", True)),
+        pinned_part_ids=spec.get("pinned_part_ids"),
+    )
+    return {"region": region, **result, "catalog_version": catalog.version}
+
+
+def _catalog_for(version: int) -> CatalogSnapshot:
+    global _worker_catalog
+    # Versions only grow: a worker that already holds a newer catalog than the chunk asks for keeps it
+    # (run_chunk accepts "or newer") instead of reloading on every chunk of an older batch
+    if _worker_catalog is None or version > _worker_catalog.version:
+        from app.db import SessionLocal
+
+        with SessionLocal() as db:
+            _worker_catalog = load_catalog(db)
+    return _worker_catalog
+
+
+def run_chunk(version: int, chunk: list[tuple[int, dict]]) -> list[dict]:
+    """Worker entry point: builds for (index, spec) pairs against catalog version (or newer)."""
+    catalog = _catalog_for(version)
+    return [{"index": i, **build_for_spec(catalog, spec)} for i, spec in chunk]
+
+
+def _chunks(specs: Iterable[dict], size: int) -> Iterator[list[tuple[int, dict]]]:
+    chunk: list[tuple[int, dict]] = []
+    for item in enumerate(specs):
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _new_pool(workers: int) -> ProcessPoolExecutor:
+    # spawn: forking a process that runs an event loop and DB connections is not safe
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def get_batch_pool() -> ProcessPoolExecutor:
+    """Process pool shared by batch requests in this process, created on first use."""
+    global _pool
+    if _pool is None:
+        _pool = _new_pool(BATCH_WORKERS)
+    return _pool
+
+
+def shutdown_batch_pool() -> None:
+    """Stop the shared pool's workers (app shutdown)."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def iter_builds(
+    catalog: CatalogSnapshot, specs: list[dict], workers: int = BATCH_WORKERS, chunk_size: int = BATCH_CHUNK_SIZE
+) -> Iterator[dict]:
+    """
+    Sync batch (CLI): results as chunks complete, each tagged with its spec's index. Runs in-process when
+    there is a single worker or a single chunk, since starting workers would cost more than it saves.
+    """
+    if workers <= 1 or len(specs) <= chunk_size:
+        for i, spec in enumerate(specs):
+            yield {"index": i, **build_for_spec(catalog, spec)}
+        return
+    with _new_pool(workers) as pool:
+        futures = [pool.submit(run_chunk, catalog.version, chunk) for chunk in _chunks(specs, chunk_size)]
+        for future in as_completed(futures):
+            yield from future.result()
+
+
+async def aiter_builds(
+    db: AsyncSession, specs: list[dict], pool: Executor | None = None, chunk_size: int = BATCH_CHUNK_SIZE
+) -> AsyncIterator[dict]:
+    """Async batch (API): like iter_builds, using the shared pool so workers keep their loaded catalog."""
+    catalog = await get_catalog(db)
+    if BATCH_WORKERS <= 1 or len(specs) <= chunk_size:
+        for i, spec in enumerate(specs):
+            yield {"index": i, **build_for_spec(catalog, spec)}
+        return
+    loop = asyncio.get_running_loop()
+    pool = pool or get_batch_pool()
+    futures = [loop.run_in_executor(pool, run_chunk, catalog.version, chunk) for chunk in _chunks(specs, chunk_size)]
+    for next_done in asyncio.as_completed(futures):
+        for row in await next_done:
+            yield row
+
+
+def grid_specs(budgets: list[float], use_cases: list[str], regions: list[str], include_os: bool = True) -> list[dict]:
+    """Every budget x use case x region combination as specs."""
+    unknown = [u for u in use_cases if u not in USE_CASE_WEIGHTS]
+    if unknown:
+        raise ValueError(f"Unknown use cases: {', '.join(unknown)}")
+    return [
+        {"budget": b, "region": r, "use_case": u, "include_os": include_os}
+        for u in use_cases
+        for r in regions
+        for b in budgets
+    ]
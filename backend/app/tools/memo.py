@@ -0,0 +1,89 @@
+"""Memoized tool results: serialized JSON keyed on normalized arguments and the catalog version."""
+
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.catalog import get_catalog
+from app.metrics import Collected, register
+
+# Entries kept across all memoized tools (least recently used are evicted first)
+TOOL_MEMO_SIZE = int(os.environ.get("TOOL_MEMO_SIZE", "4096"))
+
+
+class ToolMemo:
+    """
+    LRU of tool output strings. Keys include the catalog version, so results computed against an older
+    snapshot are never served after a refresh; they just age out.
+    """
+
+    def __init__(self, maxsize: int = TOOL_MEMO_SIZE) -> None:
+        self.maxsize = maxsize
+        self._entries: OrderedDict[Hashable, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits: dict[str, int] = {}
+        self._misses: dict[str, int] = {}
+        self.evictions = 0
+
+    async def get_or_compute(
+        self, db: AsyncSession, tool: str, args: tuple, compute: Callable[[], Awaitable[str]]
+    ) -> str:
+        """Return the memoized output of tool for args (already normalized), computing it on a miss."""
+        version = (await get_catalog(db)).version
+        key = (tool, version, args)
+        with self._lock:
+            out = self._entries.get(key)
+            if out is not None:
+                self._entries.move_to_end(key)
+                self._hits[tool] = self._hits.get(tool, 0) + 1
+                return out
+            self._misses[tool] = self._misses.get(tool, 0) + 1
+        out = await compute()
+        with self._lock:
+            self._entries[key] = out
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return out
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Per-tool hits, misses and hit rate, plus size and evictions."""
+        with self._lock:
+            hits, misses = dict(self._hits), dict(self._misses)
+            size, evictions = len(self._entries), self.evictions
+        tools = {}
+        for tool in sorted(set(hits) | set(misses)):
+            h, m = hits.get(tool, 0), misses.get(tool, 0)
+            tools[tool] = {"hits": h, "misses": m, "hit_rate": round(h / (h + m), 4)}
+        return {"size": size, "maxsize": self.maxsize, "evictions": evictions, "tools": tools}
+
+
+tool_memo = ToolMemo()
+
+
+def _memo_lookups():
+    for tool, counts in tool_memo.stats()["tools"].items():
+        yield (tool, "hit"), counts["hits"]
+        yield (tool, "miss"), counts["misses"]
+
+
+register(Collected("tool_memo_lookups_total", "Memoized tool lookups by result.", "counter", ("tool", "result"), _memo_lookups))
+register(Collected("tool_memo_evictions_total", "Memoized tool results evicted (LRU).", "counter", (), lambda: [((), tool_memo.stats()["evictions"])]))
+register(Collected("tool_memo_entries", "Memoized tool results held.", "gauge", (), lambda: [((), tool_memo.stats()["size"])]))
+
+
+def search_args(category: str, max_price: float | None, limit: int, compatible_with: list[str] | None) -> tuple:
+    """Normalized search_parts arguments (compatible_with is a set constraint, so order does not matter)."""
+    return (
+        category,
+        None if max_price is None else round(float(max_price), 2),
+        int(limit),
+        tuple(sorted(set(compatible_with or []))),
+    )
@@ -0,0 +1,425 @@
+"""Build optimizer: pick one part per category for a high use-case-weighted score under a budget."""
+
+import asyncio
+import heapq
+from bisect import bisect_right
+from itertools import combinations
+from math import log1p
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.catalog import CatalogSnapshot, get_catalog
+from app.tools.build import get_tax_rate
+
+# One part from each of these makes a build (same categories as search_parts)
+BUILD_CATEGORIES = [
+    "CPU",
+    "CPU Cooler",
+    "Motherboard",
+    "Memory",
+    "Storage",
+    "GPU",
+    "Case",
+    "Power Supply",
+]
+
+# Compatibility splits for the optimizer: (category, categories its parts constrain), applied in order
+_COMPAT_SPLITS: list[tuple[str, list[str]]] = [
+    ("CPU", ["Motherboard", "Memory", "CPU Cooler"]),
+    ("Motherboard", ["Memory", "CPU Cooler"]),
+    ("Power Supply", ["GPU"]),
+]
+
+# Reserved for Windows 11 Home when include_os is set (matches the ~$120 the assistant is told to reserve)
+OS_RESERVE_USD = 119.99
+
+# Relative importance of each category per use case. A part scores weight * log(1 + price): more money
+# buys more performance with diminishing returns, so the budget is spread roughly by these weights.
+USE_CASE_WEIGHTS: dict[str, dict[str, float]] = {
+    "gaming": {
+        "GPU": 0.36, "CPU": 0.18, "Motherboard": 0.09, "Memory": 0.09,
+        "Storage": 0.09, "Power Supply": 0.08, "Case": 0.06, "CPU Cooler": 0.05,
+    },
+    "workstation": {
+        "CPU": 0.28, "GPU": 0.18, "Memory": 0.16, "Storage": 0.12,
+        "Motherboard": 0.10, "CPU Cooler": 0.06, "Power Supply": 0.06, "Case": 0.04,
+    },
+    "streaming": {
+        "GPU": 0.28, "CPU": 0.26, "Memory": 0.12, "Storage": 0.10,
+        "Motherboard": 0.09, "Power Supply": 0.07, "CPU Cooler": 0.05, "Case": 0.03,
+    },
+    "general": {
+        "CPU": 0.20, "Storage": 0.20, "Memory": 0.15, "Motherboard": 0.12,
+        "GPU": 0.10, "Power Supply": 0.09, "Case": 0.08, "CPU Cooler": 0.06,
+    },
+}
+
+_EPS = 1e-9
+
+# Positions either side of the greedy choice searched exactly by the refinement step
+REFINE_WINDOW = 4
+# Cap on partial builds kept per step of the refinement (bounds its cost on very dense catalogs)
+REFINE_MAX_STATES = 128
+
+
+def _upper_hull(prices, weight: float, scores=None) -> list[int]:
+    """
+    Indices (into price-sorted prices) on the upper concave hull of (price, score), cheapest first.
+    Scores default to weight * log(1 + price).
+    """
+    if scores is None:
+        scores = [weight * log1p(p) for p in prices]
+    hull: list[int] = []
+    for i, p in enumerate(prices):
+        if hull and prices[hull[-1]] == p:
+            continue
+        v = scores[i]
+        while len(hull) >= 2:
+            a, b = hull[-2], hull[-1]
+            pa, pb = prices[a], prices[b]
+            va, vb = scores[a], scores[b]
+            # Drop b if it lies on or below the segment a -> i
+            if (vb - va) * (p - pa) <= (v - va) * (pb - pa):
+                hull.pop()
+            else:
+                break
+        hull.append(i)
+    return hull
+
+
+def _segments(category: str, prices, hull: list[int], weight: float) -> list[tuple[float, str, float, int]]:
+    """Hull steps of one category as (-score per dollar, category, price step, position reached), best first."""
+    return [
+        (-weight * (log1p(prices[b]) - log1p(prices[a])) / (prices[b] - prices[a]), category, prices[b] - prices[a], b)
+        for a, b in zip(hull, hull[1:], strict=False)
+    ]
+
+
+def _greedy(
+    free: dict[str, tuple], weights: dict[str, float], cap: float, spent: float
+) -> tuple[dict[str, int], float, float]:
+    """
+    Hull upgrades in order of marginal score per dollar, starting from the cheapest part everywhere.
+    Returns (positions, subtotal, LP bound on the score of the free categories).
+    """
+    chosen = dict.fromkeys(free, 0)
+    spent += sum(prices[0] for prices, _, _ in free.values())
+    score = sum(weights.get(c, 0.0) * log1p(prices[0]) for c, (prices, _, _) in free.items())
+    bound = None
+    blocked: set[str] = set()
+    # Each category's steps are in decreasing score per dollar (concave hull), so merging them gives the
+    # global order
+    for neg_ratio, category, step, pos in heapq.merge(*(segments for _, _, segments in free.values())):
+        if category in blocked:
+            continue
+        if spent + step <= cap + _EPS:
+            spent += step
+            score -= neg_ratio * step
+            chosen[category] = pos
+        else:
+            # Later steps of this category need this one; leave it for the fill pass
+            blocked.add(category)
+            if bound is None:
+                # First step that does not fit: the LP optimum takes the affordable fraction of it
+                bound = score - neg_ratio * max(cap - spent, 0.0)
+            if len(blocked) == len(free):
+                break
+    return chosen, spent, score if bound is None else bound
+
+
+def _fill(
+    free: dict[str, tuple], weights: dict[str, float], chosen: dict[str, int], cap: float, spent: float
+) -> float:
+    """Spend the remainder on the priciest affordable part, highest-weight categories first."""
+    for category in sorted(free, key=lambda c: -weights.get(c, 0.0)):
+        prices = free[category][0]
+        current = prices[chosen[category]]
+        best = bisect_right(prices, current + (cap - spent) + _EPS) - 1
+        if best > chosen[category] and prices[best] > current:
+            spent += prices[best] - current
+            chosen[category] = best
+    return spent
+
+
+def _lp_bound(candidates: list[list[tuple[float, float, int]]]):
+    """
+    Upper bound on the score of one (price, score, pos) pick per list as a function of money: the LP
+    relaxation, filling the lists' hull segments in order of score per dollar. -inf when unaffordable.
+    """
+    base_cost = sum(options[0][0] for options in candidates)
+    base_score = sum(options[0][1] for options in candidates)
+    segments = []
+    for options in candidates:
+        hull = [options[i] for i in _upper_hull([p for p, _, _ in options], 1.0, [v for _, v, _ in options])]
+        for (pa, va, _), (pb, vb, _) in zip(hull, hull[1:], strict=False):
+            segments.append(((vb - va) / (pb - pa), pb - pa, vb - va))
+    segments.sort(reverse=True)
+    cum_cost, cum_score = [0.0], [0.0]
+    for _, dp, dv in segments:
+        cum_cost.append(cum_cost[-1] + dp)
+        cum_score.append(cum_score[-1] + dv)
+
+    def bound(money: float) -> float:
+        money -= base_cost
+        if money < -_EPS:
+            return float("-inf")
+        money = max(money, 0.0)
+        n = bisect_right(cum_cost, money) - 1
+        extra = cum_score[n]
+        if n < len(segments):
+            extra += (money - cum_cost[n]) * segments[n][0]
+        return base_score + extra
+
+    return bound
+
+
+def _refine(
+    free: dict[str, tuple], weights: dict[str, float], chosen: dict[str, int], cap: float, spent: float
+) -> tuple[dict[str, int], float]:
+    """
+    Exact search over a window of REFINE_WINDOW positions either side of each chosen part: a DP over
+    categories keeping only Pareto-optimal (cost, score) partial builds, pruned by the incumbent's score.
+    Catches the multi-category trades greedy misses; exact when every category fits in its window
+    and the frontier stays under REFINE_MAX_STATES.
+    """
+    categories = list(free)
+    candidates = []
+    for category in categories:
+        prices = free[category][0]
+        w = weights.get(category, 0.0)
+        lo = max(0, chosen[category] - REFINE_WINDOW)
+        hi = min(len(prices), chosen[category] + REFINE_WINDOW + 1)
+        # One position per distinct price (same price, same score)
+        by_price = {float(prices[i]): i for i in range(lo, hi)}
+        candidates.append([(p, w * log1p(p), i) for p, i in sorted(by_price.items())])
+    # LP bound on the score categories k.. can add with a given amount of money (for pruning)
+    bounds = [_lp_bound([])]
+    for k in range(len(categories) - 1, -1, -1):
+        bounds.append(_lp_bound(candidates[k:]))
+    bounds.reverse()
+    incumbent = sum(weights.get(c, 0.0) * log1p(free[c][0][chosen[c]]) for c in categories)
+    base = spent - sum(free[c][0][chosen[c]] for c in categories)  # pinned parts
+
+    states: list[tuple[float, float, tuple]] = [(base, 0.0, ())]
+    for k, options in enumerate(candidates):
+        grown = [
+            (cost + p, score + v, picks + (i,))
+            for cost, score, picks in states
+            for p, v, i in options
+            if cost + p <= cap + _EPS and score + v + bounds[k + 1](cap - cost - p) > incumbent + _EPS
+        ]
+        grown.sort(key=lambda s: (s[0], -s[1]))
+        states = []
+        for state in grown:
+            if not states or state[1] > states[-1][1]:
+                states.append(state)
+        if not states:
+            return chosen, spent  # nothing in the window beats the incumbent
+        if len(states) > REFINE_MAX_STATES:
+            # Dense catalogs: keep the most promising partial builds (the search is then a beam, not exact)
+            states = heapq.nlargest(REFINE_MAX_STATES, states, key=lambda s: s[1] + bounds[k + 1](cap - s[0]))
+            states.sort()
+    cost, _, picks = states[-1]
+    return dict(zip(categories, picks, strict=True)), cost
+
+
+def _intersect(a: tuple[int, ...] | None, b: tuple[int, ...] | None) -> tuple[int, ...] | None:
+    # None: unconstrained
+    if a is None or b is None:
+        return b if a is None else a
+    if a is b:
+        return a
+    return tuple(sorted(set(a).intersection(b)))
+
+
+def _classes(
+    catalog: CatalogSnapshot, category: str, positions: tuple[int, ...] | None, targets: list[str]
+) -> list[tuple[tuple[int, ...], list[tuple[int, ...] | None]]]:
+    """
+    Split positions (None: all) of category into classes of parts with the same compatible positions in
+    each target category, as (class positions, constraint per target).
+    """
+    idx = catalog.category(category)
+    sizes = [len(catalog.category(target).ids) for target in targets]
+    groups: dict[tuple, list[int]] = {}
+    for pos in range(len(idx.ids)) if positions is None else positions:
+        constraints = tuple(
+            None if c is not None and len(c) == size else c  # compatible with everything: no constraint
+            for c, size in zip((catalog.compat.positions(idx.ids[pos], t) for t in targets), sizes, strict=True)
+        )
+        groups.setdefault(constraints, []).append(pos)
+    return [(tuple(members), list(constraints)) for constraints, members in groups.items()]
+
+
+def _scenarios(catalog: CatalogSnapshot, allowed: dict[str, tuple[int, ...] | None]) -> list[dict]:
+    """
+    Restrictions of the free categories (category -> positions, None: all) under which every pick is
+    compatible with every other: CPUs split by the boards, memory and coolers they fit, then boards by
+    the memory and coolers they fit, and power supplies by the GPUs they can feed. Every compatible
+    build falls in some scenario.
+    """
+    scenarios = [allowed]
+    for category, targets in _COMPAT_SPLITS:
+        if category not in allowed:
+            continue
+        split = []
+        for scenario in scenarios:
+            free_targets = [t for t in targets if t in scenario]
+            for members, constraints in _classes(catalog, category, scenario[category], free_targets):
+                narrowed = {**scenario, category: members}
+                for target, constraint in zip(free_targets, constraints, strict=True):
+                    narrowed[target] = _intersect(narrowed[target], constraint)
+                if all(narrowed[t] != () for t in free_targets):
+                    split.append(narrowed)
+        scenarios = split
+    return scenarios
+
+
+def _restricted(catalog: CatalogSnapshot, category: str, positions: tuple[int, ...] | None, weight: float) -> tuple:
+    """(prices, hull, segments) of category restricted to positions (None: all)."""
+    prices = catalog.category(category).prices
+    if positions is not None:
+        prices = [prices[i] for i in positions]
+    hull = _upper_hull(prices, weight)
+    return prices, hull, _segments(category, prices, hull, weight)
+
+
+def optimize(
+    catalog: CatalogSnapshot,
+    budget: float,
+    tax_rate: float,
+    use_case: str = "gaming",
+    include_os: bool = True,
+    pinned_part_ids: list[str] | None = None,
+) -> dict:
+    """
+    Choose one part per BUILD_CATEGORIES entry for a high use-case score subject to
+    (subtotal + OS reserve) * (1 + tax_rate) <= budget. Pinned parts fix their category.
+
+    Heuristic, not guaranteed optimal: greedy over each category's concave hull of upgrades by
+    score-per-dollar (the LP relaxation of the multiple-choice knapsack), a fill pass spending the
+    remainder, then an exact search over the REFINE_WINDOW positions around each pick (see _refine).
+    O(N log N) in catalog size. Returns a get_build_total-shaped dict, or {"error": ...} if infeasible.
+    """
+    weights = USE_CASE_WEIGHTS.get((use_case or "").strip().lower())
+    if weights is None:
+        return {"error": f"Unknown use_case '{use_case}'. Use one of: {', '.join(USE_CASE_WEIGHTS)}."}
+
+    pinned_snaps, unknown_ids = catalog.get_many(list(pinned_part_ids or []))
+    if unknown_ids:
+        return {"error": f"Unknown pinned part ids: {', '.join(unknown_ids)}"}
+    pinned: dict[str, dict] = {}
+    for part in {p["id"]: p for p in pinned_snaps}.values():  # the same id pinned twice is one pin
+        other = pinned.setdefault(part["category"], part)
+        if other is not part:
+            return {
+                "error": f"Pinned parts {other['id']} and {part['id']} are both in category "
+                f"{part['category']}; pin at most one part per category."
+            }
+    for a, b in combinations(pinned.values(), 2):
+        if not catalog.compatible(a["id"], b["id"]):
+            return {"error": f"Pinned parts {a['name']} ({a['id']}) and {b['name']} ({b['id']}) are not compatible."}
+
+    os_reserve = OS_RESERVE_USD if include_os else 0.0
+    cap = budget / (1 + tax_rate) - os_reserve
+
+    pinned_cost = sum(p["price_usd"] for p in pinned.values())
+    allowed: dict[str, tuple[int, ...] | None] = {}
+    for category in BUILD_CATEGORIES:
+        if category in pinned:
+            continue
+        idx = catalog.category(category)
+        if idx is None or not len(idx.prices):
+            return {"error": f"No parts available in category {category}"}
+        allowed[category] = None
+        for part in pinned.values():
+            allowed[category] = _intersect(allowed[category], catalog.compat.positions(part["id"], category))
+        if allowed[category] == ():
+            return {"error": f"No parts in category {category} are compatible with the pinned parts."}
+
+    # Scenarios and hulls depend only on the catalog version, the allowed sets and the weights: cache them on
+    # the snapshot so repeated calls skip the O(N) splits
+    scenarios = catalog.derived(
+        ("optimize.scenarios", tuple((c, allowed[c]) for c in sorted(allowed))),
+        lambda: _scenarios(catalog, allowed),
+    )
+    if not scenarios:
+        return {"error": "No compatible combination of parts in the catalog."}
+
+    # Greedy + fill in every scenario; exact refinement where the LP bound could still beat the best
+    solved = []
+    minimum = None
+    for scenario in scenarios:
+        free = {
+            category: catalog.derived(
+                ("optimize.hull", category, positions, weights.get(category, 0.0)),
+                lambda c=category, pos=positions: _restricted(catalog, c, pos, weights.get(c, 0.0)),
+            )
+            for category, positions in scenario.items()
+        }
+        cheapest = pinned_cost + sum(prices[0] for prices, _, _ in free.values())
+        minimum = cheapest if minimum is None else min(minimum, cheapest)
+        if cheapest > cap + _EPS:
+            continue
+        chosen, spent, bound = _greedy(free, weights, cap, pinned_cost)
+        spent = _fill(free, weights, chosen, cap, spent)
+        score = sum(weights.get(c, 0.0) * log1p(free[c][0][chosen[c]]) for c in free)
+        solved.append((bound, score, spent, chosen, free, scenario))
+
+    if not solved:
+        minimum = round((minimum + os_reserve) * (1 + tax_rate), 2)
+        return {"error": f"Budget too low: the cheapest compatible build costs ${minimum:.2f} after tax."}
+
+    _, best_score, _, chosen, _, scenario = max(solved, key=lambda e: e[1])
+    best = (chosen, scenario)
+    for bound, _, spent, chosen, free, scenario in sorted(solved, key=lambda e: -e[0]):
+        if bound <= best_score + _EPS:
+            break
+        chosen, spent = _refine(free, weights, chosen, cap, spent)
+        score = sum(weights.get(c, 0.0) * log1p(free[c][0][chosen[c]]) for c in free)
+        if score > best_score + _EPS:
+            best_score, best = score, (chosen, scenario)
+    chosen, scenario = best
+    chosen = {c: pos if scenario[c] is None else scenario[c][pos] for c, pos in chosen.items()}
+
+    parts = [
+        pinned[c] if c in pinned else catalog.snapshot(c, chosen[c])
+        for c in BUILD_CATEGORIES
+    ]
+    subtotal = sum(p["price_usd"] for p in parts)
+    score = sum(weights.get(p["category"], 0.0) * log1p(p["price_usd"]) for p in parts)
+    return {
+        "subtotal": round(subtotal, 2),
+        "tax_rate": tax_rate,
+        "total": round(subtotal * (1 + tax_rate), 2),
+        "parts": parts,
+        "use_case": use_case,
+        "os_reserve": os_reserve,
+        "total_with_os": round((subtotal + os_reserve) * (1 + tax_rate), 2),
+        "budget": budget,
+        "score": round(score, 4),
+    }
+
+
+async def optimize_build(
+    db: AsyncSession,
+    budget: float,
+    region: str,
+    use_case: str = "gaming",
+    include_os: bool = True,
+    pinned_part_ids: list[str] | None = None,
+) -> dict:
+    """
+    Optimize a build against the current catalog snapshot, with tax for the given US state/region. The
+    search runs in a worker thread so a cold call on a large catalog does not stall the event loop.
+    """
+    catalog = await get_catalog(db)
+    return await asyncio.to_thread(
+        optimize,
+        catalog,
+        budget=budget,
+        tax_rate=get_tax_rate(region),
+        use_case=use_case,
+        include_os=include_os,
+        pinned_part_ids=pinned_part_ids,
+    )
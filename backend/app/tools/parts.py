@@ -1,28 +1,50 @@
-"""Part search tool: query parts from DB by category and max price."""
+"""Part search tool: serve catalog lookups from the in-memory catalog index."""
 
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.parts import search_parts as db_search_parts
+from app.db.catalog import get_catalog
 
 
-def search_parts(
-    db: Session,
+async def search_parts(
+    db: AsyncSession,
     category: str,
     max_price: float | None = None,
     limit: int = 10,
+    compatible_with: list[str] | None = None,
 ) -> list[dict]:
     """
-    Search parts by category and optional max price.
+    Search parts by category and optional max price, optionally only parts compatible with the given
+    part ids (socket, memory type, cooler socket support, PSU wattage).
     Returns list of dicts with id, category, name, price_usd, link.
     """
-    parts = db_search_parts(db, category=category, max_price=max_price, limit=limit)
-    return [
-        {
-            "id": p.id,
-            "category": p.category,
-            "name": p.name,
-            "price_usd": p.price_usd,
-            "link": p.link,
-        }
-        for p in parts
-    ]
+    catalog = await get_catalog(db)
+    return catalog.search(category, max_price=max_price, limit=limit, compatible_with=compatible_with)
+
+
+async def get_part_by_id(db: AsyncSession, part_id: str) -> dict | None:
+    """Return a part snapshot (id, category, name, price_usd, link) by id, or None."""
+    catalog = await get_catalog(db)
+    return catalog.get(part_id)
+
+
+async def resolve_parts(db: AsyncSession, part_ids: list[str]) -> tuple[list[dict], list[str]]:
+    """
+    Resolve part ids against one catalog snapshot. Returns (snapshots in input order with duplicates
+    preserved, unknown ids).
+    """
+    catalog = await get_catalog(db)
+    return catalog.get_many(part_ids)
+
+
+async def compatible_parts(
+    db: AsyncSession,
+    part_id: str,
+    category: str,
+    max_price: float | None = None,
+    limit: int = 10,
+) -> list[dict]:
+    """Cheapest-first parts in category compatible with part_id. Raises ValueError for an unknown part id."""
+    catalog = await get_catalog(db)
+    if catalog.get(part_id) is None:
+        raise ValueError(f"Unknown part id: {part_id}")
+    return catalog.search(category, max_price=max_price, limit=limit, compatible_with=[part_id])
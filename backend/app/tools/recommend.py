@@ -0,0 +1,122 @@
+"""
+Recommendation table: best builds precomputed over a budget grid for each use case, per catalog version.
+
+scripts/refresh_parts.py fills the table after every catalog change. Grid points are pre-tax parts budgets
+(excluding the OS reserve), so one row serves every region and both include_os settings: a request's
+budget is converted to its parts budget and rounded down to the grid, which keeps the build within budget
+after tax. Workers hold the current version's rows in memory, so a lookup is a dict read.
+"""
+
+from math import floor
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.db.catalog import CatalogSnapshot, get_catalog, load_catalog
+from app.db.models import Recommendation
+from app.tools.build import get_tax_rate
+from app.tools.optimize import OS_RESERVE_USD, USE_CASE_WEIGHTS, optimize
+
+# Parts budget grid in whole USD (inclusive)
+GRID_MIN_USD = 500
+GRID_MAX_USD = 5000
+GRID_STEP_USD = 50
+
+# (catalog version, {(use_case, parts_budget): (part_ids, score)}) of this worker
+_table: tuple[int, dict[tuple[str, int], tuple[list[str], float]]] | None = None
+
+
+def grid_budgets() -> range:
+    return range(GRID_MIN_USD, GRID_MAX_USD + 1, GRID_STEP_USD)
+
+
+def build_table(catalog: CatalogSnapshot) -> list[Recommendation]:
+    """Best build for every use case and grid budget; infeasible grid points are left out."""
+    rows = []
+    for use_case in USE_CASE_WEIGHTS:
+        for parts_budget in grid_budgets():
+            result = optimize(catalog, budget=parts_budget, tax_rate=0.0, use_case=use_case, include_os=False)
+            if "error" in result:
+                continue
+            rows.append(Recommendation(
+                catalog_version=catalog.version,
+                use_case=use_case,
+                parts_budget=parts_budget,
+                part_ids=[p["id"] for p in result["parts"]],
+                subtotal=result["subtotal"],
+                score=result["score"],
+            ))
+    return rows
+
+
+def refresh_recommendations(db: Session, force: bool = False) -> int:
+    """
+    Materialize the table for the current catalog version (sync; used by scripts) unless it already
+    exists, and drop rows of older versions. Commits and returns the number of rows for this version.
+    """
+    catalog = load_catalog(db)
+    existing = db.execute(
+        select(func.count()).select_from(Recommendation).where(Recommendation.catalog_version == catalog.version)
+    ).scalar()
+    if existing and not force:
+        return existing
+    db.execute(delete(Recommendation).where(Recommendation.catalog_version <= catalog.version))
+    rows = build_table(catalog)
+    db.add_all(rows)
+    db.commit()
+    return len(rows)
+
+
+async def _load_table(db: AsyncSession, version: int) -> dict[tuple[str, int], tuple[list[str], float]]:
+    global _table
+    if _table is None or _table[0] != version:
+        result = await db.execute(
+            select(Recommendation.use_case, Recommendation.parts_budget, Recommendation.part_ids, Recommendation.score)
+            .where(Recommendation.catalog_version == version)
+        )
+        rows = {(u, b): (ids, score) for u, b, ids, score in result.all()}
+        if not rows:
+            return rows  # not materialized yet (refresh still running): check again next time
+        _table = (version, rows)
+    return _table[1]
+
+
+async def recommended_build(
+    db: AsyncSession,
+    budget: float,
+    region: str,
+    use_case: str = "gaming",
+    include_os: bool = True,
+) -> dict | None:
+    """
+    Precomputed build for budget (after tax for region), shaped like optimize_build's result, or None when
+    the budget falls outside the grid or the table has no row for the current catalog version.
+    """
+    use_case = (use_case or "").strip().lower()
+    catalog = await get_catalog(db)
+    table = await _load_table(db, catalog.version)
+    tax_rate = get_tax_rate(region)
+    os_reserve = OS_RESERVE_USD if include_os else 0.0
+    cap = budget / (1 + tax_rate) - os_reserve
+    if not GRID_MIN_USD <= cap < GRID_MAX_USD + GRID_STEP_USD:
+        return None
+    parts_budget = GRID_MIN_USD + floor((cap - GRID_MIN_USD) / GRID_STEP_USD) * GRID_STEP_USD
+    row = table.get((use_case, min(parts_budget, GRID_MAX_USD)))
+    if row is None:
+        return None
+    parts, unknown_ids = catalog.get_many(row[0])
+    if unknown_ids:
+        return None
+    subtotal = sum(p["price_usd"] for p in parts)
+    return {
+        "subtotal": round(subtotal, 2),
+        "tax_rate": tax_rate,
+        "total": round(subtotal * (1 + tax_rate), 2),
+        "parts": parts,
+        "use_case": use_case,
+        "os_reserve": os_reserve,
+        "total_with_os": round((subtotal + os_reserve) * (1 + tax_rate), 2),
+        "budget": budget,
+        "score": row[1],
+    }
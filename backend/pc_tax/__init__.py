@@ -0,0 +1,116 @@
+"""
+US sales tax resolution from local data (no LLM, no network), shared by the backend and pc_builder.curate.
+
+Resolves a state code, a state name or a ZIP code (also "City, ST" or an address ending in a ZIP) to a
+rate. A ZIP code gets the combined state + local rate of its 5-digit code or 3-digit prefix when the
+table lists one, else its state's base rate (state by 3-digit prefix). The data ships with this package
+as tax_rates.json; TAX_RATES_FILE points at a replacement file. Standard library only, so both
+distributions can ship it without depending on each other.
+"""
+
+import json
+import logging
+import os
+import re
+from functools import lru_cache
+from importlib import resources
+
+logger = logging.getLogger(__name__)
+
+_ZIP_RE = re.compile(r"\b(\d{5})(?:-\d{4})?\b")
+_NAME_RE = re.compile(r"[^A-Z ]+")
+
+
+def _zip_code(value: str) -> str | None:
+    # Last 5-digit group: in "12345 Main St, Springfield 62704" the ZIP comes after the house number
+    found = _ZIP_RE.findall(value or "")
+    return found[-1] if found else None
+
+
+def _normalize_name(value: str) -> str:
+    # "Washington, D.C." -> "WASHINGTON D C"
+    return " ".join(_NAME_RE.sub(" ", value.upper()).split())
+
+
+class TaxTable:
+    """
+    Precomputed lookup tables: state codes and names (plus aliases) in one dict, a 1000-slot array from
+    3-digit ZIP prefix to state, and combined rates by 5-digit ZIP or 3-digit prefix. Every resolution is
+    a few dict or list lookups.
+    """
+
+    def __init__(
+        self,
+        states: dict[str, tuple[str, float]],
+        aliases: dict[str, str] | None = None,
+        zip3: list[tuple[int, int, str]] | None = None,
+        zip_rates: dict[str, float] | None = None,
+    ) -> None:
+        self._rates = {code.upper(): float(rate) for code, (_, rate) in states.items()}
+        self._codes: dict[str, str] = {code.upper(): code.upper() for code in states}
+        for code, (name, _) in states.items():
+            self._codes[_normalize_name(name)] = code.upper()
+        for alias, code in (aliases or {}).items():
+            self._codes[_normalize_name(alias)] = code.upper()
+        self._zip3: list[str | None] = [None] * 1000
+        for lo, hi, code in zip3 or []:
+            for prefix in range(int(lo), int(hi) + 1):
+                self._zip3[prefix] = code.upper()
+        self._zip_rates: dict[str, float] = {}
+        for prefix, rate in (zip_rates or {}).items():
+            if len(prefix) not in (3, 5) or not prefix.isdigit():
+                raise ValueError(f"zip_rates keys must be 3- or 5-digit ZIP prefixes, got {prefix!r}")
+            self._zip_rates[prefix] = float(rate)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TaxTable":
+        return cls(
+            states={code: (name, rate) for code, (name, rate) in data["states"].items()},
+            aliases=data.get("aliases"),
+            zip3=[tuple(r) for r in data.get("zip3", [])],
+            zip_rates=data.get("zip_rates"),
+        )
+
+    def state_for(self, region: str) -> str | None:
+        """Two-letter state code for a state code, name or ZIP; None if unknown."""
+        region = (region or "").strip()
+        if not region:
+            return None
+        zip_code = _zip_code(region)
+        if zip_code:
+            return self._zip3[int(zip_code[:3])]
+        code = self._codes.get(_normalize_name(region))
+        if code is None and "," in region:
+            # "San Jose, CA" / "Austin, Texas"
+            code = self._codes.get(_normalize_name(region.rsplit(",", 1)[1]))
+        return code
+
+    def rate(self, region: str) -> float:
+        """
+        Sales tax rate (decimal) for a state code, name or ZIP: the combined rate of a listed ZIP code or
+        prefix, else the statewide base rate; 0.0 if unknown.
+        """
+        zip_code = _zip_code(region or "")
+        if zip_code:
+            combined = self._zip_rates.get(zip_code, self._zip_rates.get(zip_code[:3]))
+            if combined is not None:
+                return combined
+        code = self.state_for(region)
+        return self._rates.get(code, 0.0) if code else 0.0
+
+
+@lru_cache(maxsize=1)
+def get_tax_table() -> TaxTable:
+    """Table from TAX_RATES_FILE, or the packaged tax_rates.json; loaded once per process."""
+    path = os.environ.get("TAX_RATES_FILE")
+    if path:
+        logger.debug("Loading tax rates from %s", path)
+        with open(path, encoding="utf-8") as f:
+            return TaxTable.from_dict(json.load(f))
+    data = resources.files(__name__).joinpath("tax_rates.json").read_text(encoding="utf-8")
+    return TaxTable.from_dict(json.loads(data))
+
+
+def get_tax_rate(region: str) -> float:
+    """Return tax rate for a US state code, state name or ZIP code (e.g. CA, California, 94103)."""
+    return get_tax_table().rate(region)
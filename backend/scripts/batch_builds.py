@@ -0,0 +1,96 @@
+"""
+Optimized builds for many specs without the LLM, written as NDJSON. Run from backend:
+python scripts/batch_builds.py specs.jsonl > builds.ndjson, or generate a grid with
+python scripts/batch_builds.py --budgets 500:5000:50 --use-cases gaming,workstation --regions CA,TX,NY.
+
+Specs are JSON (array), JSONL or CSV with columns budget, region, use_case, include_os. Work is split
+into chunks across a process pool (--workers, default one per core); lines come out in completion
+order, each with the index of its spec.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+_script_dir = os.path.dirname(os.path.abspath(__file__))
+_backend_dir = os.path.dirname(_script_dir)
+sys.path.insert(0, _backend_dir)
+
+from app.db import SessionLocal, init_db
+from app.db.catalog import load_catalog
+from app.tools.batch import BATCH_CHUNK_SIZE, BATCH_WORKERS, grid_specs, iter_builds
+from app.tools.optimize import USE_CASE_WEIGHTS
+
+
+def _read_specs(path: str) -> list[dict]:
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.endswith(".csv"):
+            return [
+                {**row, "include_os": (row.get("include_os") or "true").strip().lower() not in ("0", "false", "no")}
+                for row in csv.DictReader(f)
+            ]
+        text = f.read()
+    if text.lstrip().startswith("["):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def _budget_range(value: str) -> list[float]:
+    """start:stop:step (inclusive) or a comma-separated list."""
+    if ":" in value:
+        start, stop, step = (float(x) for x in value.split(":"))
+        n = int((stop - start) // step) + 1
+        return [round(start + i * step, 2) for i in range(n)]
+    return [float(x) for x in value.split(",")]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("specs", nargs="?", help="spec file (JSON array, JSONL or CSV); omit to use the grid options")
+    parser.add_argument("--budgets", default="500:5000:50", help="grid budgets: start:stop:step or a comma list")
+    parser.add_argument("--use-cases", default=",".join(USE_CASE_WEIGHTS), help="grid use cases (comma list)")
+    parser.add_argument("--regions", default="CA", help="grid regions (comma list)")
+    parser.add_argument("--no-os", action="store_true", help="grid specs without the OS reserve")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS, help="worker processes (1: in-process)")
+    parser.add_argument("--chunk-size", type=int, default=BATCH_CHUNK_SIZE, help="specs per unit of work")
+    parser.add_argument("--out", help="write NDJSON here instead of stdout")
+    args = parser.parse_args()
+
+    if args.specs:
+        specs = _read_specs(args.specs)
+    else:
+        try:
+            specs = grid_specs(
+                _budget_range(args.budgets),
+                [u.strip() for u in args.use_cases.split(",") if u.strip()],
+                [r.strip() for r in args.regions.split(",") if r.strip()],
+                include_os=not args.no_os,
+            )
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            sys.exit(2)
+
+    init_db()
+    with SessionLocal() as db:
+        catalog = load_catalog(db)
+
+    out = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+    started = time.perf_counter()
+    errors = 0
+    try:
+        for row in iter_builds(catalog, specs, workers=args.workers, chunk_size=args.chunk_size):
+            errors += "error" in row
+            out.write(json.dumps(row) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - started
+    rate = len(specs) / elapsed * 60 if elapsed else 0.0
+    print(f"{len(specs)} specs ({errors} errors) in {elapsed:.2f}s, {rate:.0f} specs/minute", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
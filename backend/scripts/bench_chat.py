@@ -0,0 +1,303 @@
+"""
+Offline load benchmark for POST /api/chat (or /api/chat/stream with --stream). Run from backend:
+python scripts/bench_chat.py [--sessions 50 ...].
+
+Serves a scripted stand-in for the OpenAI chat-completions API on localhost, so the real app
+(app.main:app, ChatOpenAI, tools, checkpointer, database) runs with no API key or network. Each
+session is a multi-turn build conversation (optimize_build, then a GPU swap via search_parts and
+get_build_total, then a plain reply). The fake API answers stream=true requests with chat.completion.chunk
+server-sent events, as OpenAI does. Reports turn latency percentiles (and time to first token when
+streaming), turns per second, SQL statements per turn and checkpoint bytes per turn as JSON, for
+comparison between commits.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+_script_dir = os.path.dirname(os.path.abspath(__file__))
+_backend_dir = os.path.dirname(_script_dir)
+sys.path.insert(0, _backend_dir)
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+# User messages of one session, in order
+CONVERSATION = [
+    "I have $1500 for a gaming PC and I live in California.",
+    "Can you swap the GPU for something under $400?",
+    "Thanks, that looks good.",
+]
+
+
+def _tool_call(name: str, args: dict) -> dict:
+    return {"id": f"call_{uuid.uuid4().hex[:24]}", "type": "function", "function": {"name": name, "arguments": json.dumps(args)}}
+
+
+def _last_tool_result(messages: list[dict], tool: str) -> dict | list | None:
+    """Parsed content of the most recent tool message answering a call to tool."""
+    names = {}
+    for m in messages:
+        for tc in m.get("tool_calls") or []:
+            names[tc["id"]] = tc["function"]["name"]
+    for m in reversed(messages):
+        if m.get("role") == "tool" and names.get(m.get("tool_call_id")) == tool:
+            return json.loads(m["content"])
+    return None
+
+
+def scripted_reply(messages: list[dict]) -> dict:
+    """Next assistant message for the scripted conversation, given the request's messages."""
+    last = messages[-1]
+    turn = sum(1 for m in messages if m.get("role") == "user")
+    if last.get("role") == "user":
+        if turn == 1:
+            return {"content": "", "tool_calls": [_tool_call("optimize_build", {"budget": 1500, "region": "CA", "use_case": "gaming"})]}
+        if turn == 2:
+            return {"content": "", "tool_calls": [_tool_call("search_parts", {"category": "GPU", "max_price": 400, "limit": 5})]}
+        return {"content": "You're welcome! Enjoy the build."}
+
+    called = next(m for m in reversed(messages) if m.get("tool_calls"))["tool_calls"][-1]["function"]["name"]
+    if called == "search_parts":
+        gpus = _last_tool_result(messages, "search_parts") or []
+        build = _last_tool_result(messages, "optimize_build") or {}
+        part_ids = [p["id"] for p in build.get("parts") or [] if p.get("category") != "GPU"]
+        if gpus:
+            part_ids.append(gpus[0]["id"])
+        return {"content": "", "tool_calls": [_tool_call("get_build_total", {"part_ids": part_ids, "region": "CA"})]}
+    result = _last_tool_result(messages, called) or {}
+    total = result.get("total") if isinstance(result, dict) else None
+    return {"content": f"Here is your build. Total after tax: ${total}. Want any changes?"}
+
+
+def _chunks(completion_id: str, model: str, message: dict, usage: dict | None) -> list[dict]:
+    """message as OpenAI streams it: role, content word by word, one tool call per index, finish reason."""
+    base = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model}
+
+    def chunk(delta: dict, finish_reason: str | None = None) -> dict:
+        return {**base, "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+
+    out = [chunk({"role": "assistant", "content": ""})]
+    words = (message.get("content") or "").split(" ")
+    out += [chunk({"content": word if i == 0 else f" {word}"}) for i, word in enumerate(words) if word]
+    for i, tc in enumerate(message.get("tool_calls") or []):
+        head = {"index": i, "id": tc["id"], "type": "function", "function": {"name": tc["function"]["name"], "arguments": ""}}
+        out.append(chunk({"tool_calls": [head]}))
+        out.append(chunk({"tool_calls": [{"index": i, "function": {"arguments": tc["function"]["arguments"]}}]}))
+    out.append(chunk({}, "tool_calls" if message.get("tool_calls") else "stop"))
+    if usage is not None:
+        out.append({**base, "choices": [], "usage": usage})
+    return out
+
+
+def fake_openai(latency: float) -> FastAPI:
+    """Minimal chat-completions server replaying the scripted conversation after latency seconds."""
+    api = FastAPI()
+
+    @api.post("/v1/chat/completions")
+    async def completions(request: Request):
+        body = await request.json()
+        await asyncio.sleep(latency)
+        message = scripted_reply(body["messages"])
+        prompt_tokens = len(json.dumps(body["messages"])) // 4
+        completion_tokens = len(json.dumps(message)) // 4
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+        if body.get("stream"):
+            include_usage = (body.get("stream_options") or {}).get("include_usage")
+            chunks = _chunks(f"chatcmpl-{uuid.uuid4().hex}", body.get("model", "gpt-4o-mini"), message, usage if include_usage else None)
+
+            async def events():
+                for c in chunks:
+                    yield f"data: {json.dumps(c)}\n\n"
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(events(), media_type="text/event-stream")
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-4o-mini"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", **message},
+                "finish_reason": "tool_calls" if message.get("tool_calls") else "stop",
+            }],
+            "usage": usage,
+        }
+
+    return api
+
+
+def _serve(api: FastAPI) -> str:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(api, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}/v1"
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    i = min(len(sorted_values) - 1, max(0, round(q * (len(sorted_values) - 1))))
+    return sorted_values[i]
+
+
+async def _stream_turn(client: httpx.AsyncClient, payload: dict, started: float) -> tuple[dict | None, float | None]:
+    """POST /api/chat/stream; returns (done event data or None on error, seconds to first token event)."""
+    first_token = None
+    event = None
+    async with client.stream("POST", "/api/chat/stream", json=payload) as r:
+        if r.status_code != 200:
+            return None, None
+        async for line in r.aiter_lines():
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+                if event == "token" and first_token is None:
+                    first_token = time.perf_counter() - started
+            elif line.startswith("data: ") and event in ("done", "error"):
+                return (json.loads(line[len("data: "):]) if event == "done" else None), first_token
+    return None, first_token
+
+
+def _checkpoint_bytes(path: str) -> int:
+    if not os.path.exists(path):
+        return 0
+    with sqlite3.connect(path) as conn:
+        checkpoints = conn.execute("SELECT COALESCE(SUM(LENGTH(checkpoint) + LENGTH(metadata)), 0) FROM checkpoints").fetchone()[0]
+        writes = conn.execute("SELECT COALESCE(SUM(LENGTH(value)), 0) FROM writes").fetchone()[0]
+    return checkpoints + writes
+
+
+def _commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=_backend_dir, capture_output=True, text=True)
+    except OSError:
+        return None
+    return out.stdout.strip() or None
+
+
+async def run(args: argparse.Namespace, workdir: str) -> dict:
+    # Environment first: the app reads its settings at import time
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["CHECKPOINT_DB"] = os.path.join(workdir, "checkpoints.sqlite")
+    os.environ["OPENAI_BASE_URL"] = _serve(fake_openai(args.llm_latency_ms / 1000))
+    os.environ["OPENAI_API_KEY"] = "bench"
+    subprocess.run([sys.executable, os.path.join(_script_dir, "refresh_parts.py")], env=os.environ, check=True, capture_output=True)
+
+    from sqlalchemy import event
+
+    from app.db import async_engine
+    from app.main import app
+
+    statements = 0
+
+    def count(*_args) -> None:
+        nonlocal statements
+        statements += 1
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+
+    latencies: list[float] = []
+    first_tokens: list[float] = []
+    errors = 0
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+
+            async def session() -> None:
+                nonlocal errors
+                async with semaphore:
+                    session_id = None
+                    for message in CONVERSATION[: args.turns]:
+                        payload = {"session_id": session_id, "message": message}
+                        start = time.perf_counter()
+                        if args.stream:
+                            done, first_token = await _stream_turn(client, payload, start)
+                            if first_token is not None:
+                                first_tokens.append(first_token)
+                        else:
+                            r = await client.post("/api/chat", json=payload)
+                            done = r.json() if r.status_code == 200 else None
+                        latencies.append(time.perf_counter() - start)
+                        if done is None:
+                            errors += 1
+                            return
+                        session_id = done["session_id"]
+
+            started = time.perf_counter()
+            await asyncio.gather(*(session() for _ in range(args.sessions)))
+            elapsed = time.perf_counter() - started
+
+    turns = len(latencies)
+    ordered = sorted(latencies)
+    report = {
+        "commit": _commit(),
+        "config": {
+            "sessions": args.sessions,
+            "concurrency": args.concurrency,
+            "turns_per_session": min(args.turns, len(CONVERSATION)),
+            "llm_latency_ms": args.llm_latency_ms,
+            "endpoint": "/api/chat/stream" if args.stream else "/api/chat",
+            "checkpointer": os.environ.get("CHECKPOINTER", "sqlite"),
+        },
+        "turns": turns,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "turns_per_second": round(turns / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(_percentile(ordered, 0.50) * 1000, 2),
+            "p95": round(_percentile(ordered, 0.95) * 1000, 2),
+            "p99": round(_percentile(ordered, 0.99) * 1000, 2),
+            "max": round((ordered[-1] if ordered else 0.0) * 1000, 2),
+        },
+        "sql_statements_per_turn": round(statements / turns, 2) if turns else 0.0,
+        "checkpoint_bytes_per_turn": round(_checkpoint_bytes(os.environ["CHECKPOINT_DB"]) / turns) if turns else 0,
+    }
+    if args.stream:
+        ordered = sorted(first_tokens)
+        report["first_token_ms"] = {
+            "p50": round(_percentile(ordered, 0.50) * 1000, 2),
+            "p95": round(_percentile(ordered, 0.95) * 1000, 2),
+        }
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=50, help="conversations to run")
+    parser.add_argument("--concurrency", type=int, default=10, help="conversations in flight at once")
+    parser.add_argument("--turns", type=int, default=len(CONVERSATION), help="user turns per conversation")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="delay of each fake model response")
+    parser.add_argument("--stream", action="store_true", help="load-test POST /api/chat/stream instead of /api/chat")
+    parser.add_argument("--out", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        report = asyncio.run(run(args, workdir))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    sys.exit(1 if report["errors"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Concurrency stress test for the graph checkpointer. Run from backend: python scripts/checkpoint_stress.py.
+
+Phase 1 runs several worker processes (like several uvicorn workers) that write and read checkpoints
+against one SQLite file at the same time and counts "database is locked" errors. Phase 2 measures read
+throughput of the pooled saver as the number of reader connections grows, while a writer keeps saving
+checkpoints on the same saver. Reads scale with cores (sqlite releases the GIL while a query runs), so
+expect flat numbers on a single-core machine. Prints one JSON report; exits 1 on any lock error.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+_script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(_script_dir))
+
+from langgraph.checkpoint.base import empty_checkpoint
+
+from app.graph.checkpoint import SqliteCheckpointer, create_checkpointer
+
+# Rough size of one chat turn's state (messages plus a build)
+PAYLOAD_CHARS = 4000
+
+
+def _config(thread_id: str) -> dict:
+    return {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+
+
+async def _put(saver, thread_id: str, step: int) -> None:
+    checkpoint = empty_checkpoint()
+    checkpoint["channel_values"] = {"messages": ["x" * PAYLOAD_CHARS], "step": step}
+    await saver.aput(_config(thread_id), checkpoint, {"source": "loop", "step": step}, {})
+
+
+async def _worker(kind: str, path: str, worker: int, turns: int, threads: int) -> dict:
+    saver = create_checkpointer(kind, path)
+    locked = other = 0
+    start = time.perf_counter()
+    for i in range(turns):
+        thread_id = f"w{worker}-t{i % threads}"
+        try:
+            await saver.aget_tuple(_config(thread_id))
+            await _put(saver, thread_id, i)
+        except Exception as e:
+            if "locked" in str(e):
+                locked += 1
+            else:
+                other += 1
+    elapsed = time.perf_counter() - start
+    if hasattr(saver, "aclose"):
+        await saver.aclose()
+    return {"locked": locked, "other_errors": other, "seconds": elapsed}
+
+
+def _run_worker(args: tuple) -> dict:
+    return asyncio.run(_worker(*args))
+
+
+def write_contention(kind: str, path: str, workers: int, turns: int, threads: int) -> dict:
+    """Phase 1: concurrent writer processes on one file."""
+    asyncio.run(_worker(kind, path, -1, 1, 1))  # create the tables before the workers race
+    with multiprocessing.get_context("spawn").Pool(workers) as pool:
+        results = pool.map(_run_worker, [(kind, path, w, turns, threads) for w in range(workers)])
+    elapsed = max(r["seconds"] for r in results)
+    return {
+        "workers": workers,
+        "turns_per_worker": turns,
+        "lock_errors": sum(r["locked"] for r in results),
+        "other_errors": sum(r["other_errors"] for r in results),
+        "turns_per_second": round(workers * turns / elapsed, 1),
+    }
+
+
+async def read_scaling(path: str, reader_counts: list[int], threads: int, concurrency: int, reads: int) -> list[dict]:
+    """Phase 2: aget_tuple throughput with 0 (writer connection only) and N reader connections."""
+    seed = SqliteCheckpointer(path)
+    for t in range(threads):
+        await _put(seed, f"read-t{t}", 0)
+    await seed.aclose()
+
+    out = []
+    for readers in reader_counts:
+        saver = SqliteCheckpointer(path, readers=readers)
+        await saver.setup()
+
+        # saver and done are bound as defaults: each pass of the loop gets its own
+        async def reader(task: int, saver: SqliteCheckpointer = saver) -> None:
+            for i in range(reads // concurrency):
+                await saver.aget_tuple(_config(f"read-t{(task * 31 + i) % threads}"))
+
+        done = asyncio.Event()
+
+        async def writer(saver: SqliteCheckpointer = saver, done: asyncio.Event = done) -> int:
+            step = 0
+            while not done.is_set():
+                step += 1
+                await _put(saver, f"write-t{step % threads}", step)
+            return step
+
+        write_task = asyncio.create_task(writer())
+        start = time.perf_counter()
+        await asyncio.gather(*(reader(task) for task in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        writes = await write_task
+        await saver.aclose()
+        out.append({
+            "readers": readers,
+            "reads_per_second": round(reads / elapsed, 1),
+            "concurrent_writes_per_second": round(writes / elapsed, 1),
+        })
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--backend", default="sqlite-pool", choices=["sqlite", "sqlite-pool"])
+    parser.add_argument("--workers", type=int, default=4, help="concurrent writer processes")
+    parser.add_argument("--turns", type=int, default=200, help="read+write turns per worker")
+    parser.add_argument("--threads", type=int, default=50, help="distinct chat threads per worker")
+    parser.add_argument("--readers", default="0,1,2,4,8", help="reader pool sizes for the read phase")
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent read tasks")
+    parser.add_argument("--reads", type=int, default=4000, help="reads per pool size")
+    parser.add_argument("--db", help="checkpoint file (default: a temporary file)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.db or os.path.join(tmp, "checkpoints.sqlite")
+        report = {
+            "backend": args.backend,
+            "write_contention": write_contention(args.backend, path, args.workers, args.turns, args.threads),
+            "read_scaling": asyncio.run(
+                read_scaling(
+                    path,
+                    [int(n) for n in args.readers.split(",")],
+                    args.threads,
+                    args.concurrency,
+                    args.reads,
+                )
+            ),
+        }
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if report["write_contention"]["lock_errors"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Export sessions with their messages and builds as NDJSON or CSV. Run from backend:
+python scripts/export_data.py [--format csv] [--since 2026-01-01T00:00:00] [--gzip] [--out export.ndjson].
+
+Same stream as GET /api/export: rows are read in batches through streaming cursors, so memory stays
+flat however large the tables are. Pass the previous run's start time as --since for incremental exports.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from datetime import UTC, datetime
+
+_script_dir = os.path.dirname(os.path.abspath(__file__))
+_backend_dir = os.path.dirname(_script_dir)
+sys.path.insert(0, _backend_dir)
+
+from app.db import AsyncSessionLocal, async_engine, init_db
+from app.db.export import EXPORT_FORMATS, export_stream
+
+
+async def run(args: argparse.Namespace) -> None:
+    out = open(args.out, "wb") if args.out else sys.stdout.buffer
+    try:
+        async with AsyncSessionLocal() as db:
+            async for chunk in export_stream(db, args.format, since=args.since, gzip=args.gzip):
+                out.write(chunk)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+        else:
+            out.flush()
+        await async_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="ndjson")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="only rows created/updated at or after this (ISO 8601, UTC if no offset)")
+    parser.add_argument("--gzip", action="store_true", help="gzip the output")
+    parser.add_argument("--out", help="output file (default: stdout)")
+    args = parser.parse_args()
+
+    started = datetime.now(UTC).replace(tzinfo=None)
+    init_db()
+    asyncio.run(run(args))
+    print(f"Export complete; use --since {started.isoformat()} for the next incremental export.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
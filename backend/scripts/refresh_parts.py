@@ -1,6 +1,6 @@
-"""Seed or refresh parts table from data/parts_seed.json. Run from project root: python -m backend.scripts.refresh_parts or from backend: python scripts/refresh_parts.py."""
+"""Seed or refresh parts table from data/parts_seed.json (or a JSON/JSONL/CSV feed given as argument). Run from project root: python -m backend.scripts.refresh_parts or from backend: python scripts/refresh_parts.py [feed]."""
 
-import json
+import argparse
 import os
 import sys
 
@@ -10,28 +10,66 @@ _backend_dir = os.path.dirname(_script_dir)
 sys.path.insert(0, _backend_dir)
 sys.path.insert(0, os.path.dirname(_backend_dir))
 
-from app.db import init_db, SessionLocal
-from app.db.parts import upsert_parts
+from app.db import SessionLocal, init_db
+from app.db.catalog import bump_catalog_version
+from app.db.compat import normalize_specs
+from app.db.feed import iter_feed
+from app.db.parts import UPSERT_CHUNK_SIZE, bulk_upsert_parts
+from app.tools.recommend import refresh_recommendations
 
 
-def main() -> None:
+def _default_feed() -> str | None:
     # Project root: parent of backend/
     backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     project_root = os.path.dirname(backend_dir)
     seed_path = os.path.join(project_root, "data", "parts_seed.json")
     if not os.path.exists(seed_path):
         seed_path = os.path.join(backend_dir, "..", "data", "parts_seed.json")
-    if not os.path.exists(seed_path):
-        print("parts_seed.json not found in data/")
+    return seed_path if os.path.exists(seed_path) else None
+
+
+def _normalized(parts):
+    # Store normalized compatibility fields so workers can build the compatibility index on reload
+    for p in parts:
+        p["specs"] = normalize_specs(p["category"], p["name"], p.get("specs"))
+        yield p
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("feed", nargs="?", help="parts feed (JSON array, JSONL or CSV); default data/parts_seed.json")
+    parser.add_argument("--format", choices=["json", "jsonl", "csv"], help="feed format (default: from extension)")
+    parser.add_argument("--chunk-size", type=int, default=UPSERT_CHUNK_SIZE, help="rows per upsert transaction")
+    parser.add_argument(
+        "--rebuild-recommendations",
+        action="store_true",
+        help="recompute the recommendation table even if this catalog version has one (e.g. after an optimizer "
+        "change; running workers pick it up on restart or at the next catalog version)",
+    )
+    args = parser.parse_args()
+
+    feed_path = args.feed or _default_feed()
+    if not feed_path or not os.path.exists(feed_path):
+        print("parts feed not found (default: data/parts_seed.json)")
         sys.exit(1)
 
     init_db()
-    with open(seed_path) as f:
-        parts = json.load(f)
     db = SessionLocal()
     try:
-        count = upsert_parts(db, parts)
-        print(f"Upserted {count} new parts (existing ones updated in place). Total records in seed: {len(parts)}")
+        # The feed is streamed: only one chunk of rows is in memory at a time
+        stats = bulk_upsert_parts(db, _normalized(iter_feed(feed_path, args.format)), chunk_size=args.chunk_size)
+        print(
+            f"Inserted {stats.inserted}, updated {stats.updated}, unchanged {stats.unchanged} parts "
+            f"({stats.price_changes} price changes journaled). Total records in feed: {stats.total}"
+        )
+        if stats.inserted or stats.updated:
+            version = bump_catalog_version(db)
+            print(f"Catalog version is now {version}; running workers pick it up without a restart.")
+        else:
+            print("No changes; catalog version left as is.")
+        # Built for the new version (or the first time for an unchanged one); a no-op otherwise
+        rows = refresh_recommendations(db, force=args.rebuild_recommendations)
+        print(f"Recommendation table: {rows} precomputed builds for this catalog version.")
     finally:
         db.close()
 
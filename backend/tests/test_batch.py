@@ -0,0 +1,24 @@
+from contextlib import nullcontext
+from types import SimpleNamespace
+
+import app.db
+from app.tools import batch
+
+
+def test_worker_catalog_reloads_only_for_newer_versions(monkeypatch):
+    versions = iter([5, 7])
+    loads = []
+
+    def load_catalog(_db):
+        loads.append(next(versions))
+        return SimpleNamespace(version=loads[-1])
+
+    monkeypatch.setattr(app.db, "SessionLocal", nullcontext)
+    monkeypatch.setattr(batch, "load_catalog", load_catalog)
+    monkeypatch.setattr(batch, "_worker_catalog", None)
+
+    assert batch._catalog_for(4).version == 5  # first chunk loads whatever is current
+    assert batch._catalog_for(4).version == 5  # older request: keep the newer snapshot
+    assert batch._catalog_for(5).version == 5
+    assert batch._catalog_for(6).version == 7  # newer request: reload
+    assert loads == [5, 7]
@@ -0,0 +1,25 @@
+from app.db.catalog import CatalogSnapshot
+from app.db.compat import normalize_specs
+
+
+def test_normalize_specs_parses_units_and_drops_unparseable_numbers():
+    assert normalize_specs("Power Supply", "Generic PSU", {"wattage_w": "750W"})["wattage_w"] == 750
+    assert normalize_specs("Power Supply", "Generic PSU", {"Wattage_W": " 850 W"})["wattage_w"] == 850
+    gpu = normalize_specs("GPU", "Generic GPU", {"tdp_w": "220.5 W", "memory": "32 GB"})
+    assert (gpu["tdp_w"], gpu["recommended_psu_w"], gpu["memory"]) == (220.5, 521, "32 GB")
+    assert normalize_specs("Power Supply", "Generic PSU", {"wattage_w": "n/a"}) is None
+
+
+def test_catalog_tolerates_unit_suffixed_specs_stored_raw():
+    # Rows written before normalize_specs parsed units keep strings such as "650 W" in Part.specs
+    rows = [
+        ("gpu", "GPU", "Generic GPU", 300.0, None, {"recommended_psu_w": "650 W"}),
+        ("psu-550", "Power Supply", "PSU A", 50.0, None, {"wattage_w": "550W"}),
+        ("psu-750", "Power Supply", "PSU B", 80.0, None, {"wattage_w": "750W"}),
+        ("psu-unknown", "Power Supply", "PSU C", 90.0, None, {"wattage_w": "unknown"}),
+    ]
+    catalog = CatalogSnapshot(1, rows)
+    ids = [p["id"] for p in catalog.search("Power Supply", compatible_with=["gpu"])]
+    assert ids == ["psu-750", "psu-unknown"]
+    assert not catalog.compatible("gpu", "psu-550")
+    assert catalog.compatible("psu-750", "gpu")
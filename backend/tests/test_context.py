@@ -0,0 +1,54 @@
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.graph.message import add_messages
+
+from app.graph.context import context_node, estimate_tokens
+
+BUDGET = 400
+
+
+def _turn(n: int) -> list:
+    call_id = f"call-{n}"
+    return [
+        HumanMessage(content=f"Turn {n}: I want a quieter case and more storage. " * 4, id=f"h{n}"),
+        AIMessage(
+            content="",
+            tool_calls=[{"id": call_id, "name": "search_parts", "args": {"category": "Case"}}],
+            id=f"a{n}",
+        ),
+        ToolMessage(content='[{"name": "Case"}]' * 40, tool_call_id=call_id, id=f"t{n}"),
+        AIMessage(content=f"Here are some quieter cases for turn {n}. " * 6, id=f"r{n}"),
+    ]
+
+
+def _config(budget: int) -> dict:
+    return {"configurable": {"context_token_budget": budget}}
+
+
+def test_context_stays_within_budget_over_many_turns():
+    state = {"messages": [], "summary": ""}
+    for n in range(30):
+        state["messages"] = add_messages(state["messages"], _turn(n))
+        result = context_node(state, _config(BUDGET))
+        state["messages"] = add_messages(state["messages"], result.get("messages", []))
+        state["summary"] = result.get("summary", state["summary"])
+        assert result["context_tokens_after"] <= BUDGET
+        assert estimate_tokens(state["messages"], state["summary"]) == result["context_tokens_after"]
+    # The summary keeps the newest folded turns
+    assert state["summary"].splitlines()[-1].startswith("Assistant: Here are some quieter cases for turn 28")
+
+
+def test_oversized_summary_is_trimmed_to_fit():
+    state = {
+        "messages": _turn(0)[:1],
+        "summary": "\n".join(f"User: old request {i} " + "x" * 80 for i in range(200)),
+    }
+    result = context_node(state, _config(BUDGET))
+    assert result["context_tokens_after"] <= BUDGET
+    assert result["summary"].splitlines()[-1].startswith("User: old request 199")
+
+
+def test_under_budget_is_untouched():
+    state = {"messages": _turn(0), "summary": "User: hello"}
+    result = context_node(state, _config(10_000))
+    assert "messages" not in result and "summary" not in result
+    assert result["context_tokens_after"] == result["context_tokens_before"]
@@ -0,0 +1,66 @@
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+import app.db as db
+from app.db.models import Base
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    monkeypatch.setattr(db, "engine", engine)
+    # A database from before the unique (category, name) index, with a repeated part
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX uq_parts_category_name"))
+        for part_id in ("a", "b", "c"):
+            name = "Ryzen 5 7600" if part_id != "c" else "Ryzen 7 7700"
+            conn.execute(
+                text("INSERT INTO parts (id, category, name, price_usd, currency) VALUES (:id, 'CPU', :name, 199.0, 'USD')"),
+                {"id": part_id, "name": name},
+            )
+    return engine
+
+
+def _indexes(engine) -> set[str]:
+    return {ix["name"] for ix in inspect(engine).get_indexes("parts")}
+
+
+def test_init_db_reports_duplicates_instead_of_failing_on_the_index(engine):
+    with pytest.raises(db.MigrationError, match=r"uq_parts_category_name.*'CPU', 'Ryzen 5 7600'"):
+        db.init_db()
+    assert "uq_parts_category_name" not in _indexes(engine)
+
+
+def test_init_db_creates_the_index_once_duplicates_are_gone(engine):
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM parts WHERE id = 'b'"))
+    db.init_db()
+    assert "uq_parts_category_name" in _indexes(engine)
+    db.init_db()  # already migrated: no-op
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("sqlite:///./pcbuilder.db", "sqlite+aiosqlite:///./pcbuilder.db"),
+        ("sqlite+pysqlite:///:memory:", "sqlite+aiosqlite:///:memory:"),
+        ("sqlite+aiosqlite:///x.db", "sqlite+aiosqlite:///x.db"),
+        ("postgres://u:p@db/pc", "postgresql+asyncpg://u:p@db/pc"),
+        ("postgresql://u:p@db/pc", "postgresql+asyncpg://u:p@db/pc"),
+        ("postgresql+psycopg2://u:p@db/pc", "postgresql+asyncpg://u:p@db/pc"),
+        ("postgresql+pg8000://u:p@db/pc", "postgresql+asyncpg://u:p@db/pc"),
+        ("postgresql+psycopg://u:p@db/pc", "postgresql+psycopg://u:p@db/pc"),
+        ("postgresql+asyncpg://u:p@db/pc", "postgresql+asyncpg://u:p@db/pc"),
+        ("mysql+pymysql://u:p@db/pc", "mysql+aiomysql://u:p@db/pc"),
+        ("mysql://u:p@db/pc", "mysql+aiomysql://u:p@db/pc"),
+    ],
+)
+def test_async_url_maps_sync_drivers(url, expected):
+    assert db._async_url(url) == expected
+
+
+@pytest.mark.parametrize("url", ["oracle+cx_oracle://u:p@db/pc", "postgresql+madeup://u:p@db/pc", "not a url"])
+def test_async_url_rejects_unknown_drivers(url):
+    with pytest.raises(db.DatabaseURLError, match="DATABASE_URL"):
+        db._async_url(url)
@@ -0,0 +1,57 @@
+import io
+import json
+
+import pytest
+
+from app.db.feed import iter_csv, iter_json_array, iter_jsonl
+
+CHUNK_SIZES = [1, 2, 3, 4, 5, 7, 64]
+
+
+def _read(text: str, chunk_size: int) -> list:
+    return list(iter_json_array(io.StringIO(text), chunk_size=chunk_size))
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+@pytest.mark.parametrize(
+    "text",
+    [
+        "[12345, 678]",
+        "[]",
+        "  [ ]  ",
+        "[-1.5e10,0,true,false,null]",
+        '[{"name": "Ryzen 5 7600", "price_usd": 199.99}, {"specs": {"socket": "AM5", "tdp": 65}}]',
+        '["a, b", "[x]", "\\"quoted\\"", [1, [2, 3]]]',
+        "\n[\n  100000,\n  2\n]\n",
+    ],
+)
+def test_json_array_matches_json_loads(text, chunk_size):
+    assert _read(text, chunk_size) == json.loads(text)
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+@pytest.mark.parametrize(
+    "text",
+    ["[1,,2]", "[1 2]", "[1,]", "[,1]", "[1] x", "[1][2]", "[1, 2", "[", "", '{"a": 1}', "[1, tru]"],
+)
+def test_json_array_rejects_malformed(text, chunk_size):
+    with pytest.raises(ValueError):
+        _read(text, chunk_size)
+
+
+def test_jsonl_skips_blank_lines_and_reports_line():
+    assert list(iter_jsonl(io.StringIO('{"a": 1}\n\n{"a": 2}\n'))) == [{"a": 1}, {"a": 2}]
+    with pytest.raises(ValueError, match="line 2"):
+        list(iter_jsonl(io.StringIO('{"a": 1}\n{oops\n')))
+
+
+def test_csv_extra_columns_go_to_specs():
+    text = 'category,name,price_usd,link,socket\nCPU,Ryzen 5 7600,199.99,,AM5\n'
+    (part,) = iter_csv(io.StringIO(text, newline=""))
+    assert part == {
+        "category": "CPU",
+        "name": "Ryzen 5 7600",
+        "price_usd": "199.99",
+        "link": None,
+        "specs": {"socket": "AM5"},
+    }
@@ -0,0 +1,18 @@
+from fastapi.testclient import TestClient
+
+from app import main
+from app.graph import nodes
+
+
+def test_model_client_survives_a_restarted_lifespan(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr(main, "init_db", lambda: None)
+    clients = []
+    for _ in range(2):
+        with TestClient(main.app) as client:
+            assert client.get("/health").status_code == 200
+            http_client = nodes.get_llm().bound.http_async_client
+            assert not http_client.is_closed
+            clients.append(http_client)
+    assert clients[0] is not clients[1]
+    assert all(c.is_closed for c in clients)
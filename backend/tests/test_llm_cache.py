@@ -0,0 +1,60 @@
+import asyncio
+import os
+import time
+
+from langchain_core.messages import AIMessage
+
+from app import metrics
+from app.graph import llm_cache
+from app.graph.llm_cache import LLMCache
+
+
+def _write(cache: LLMCache, key: str, age: float, size: int = 100) -> str:
+    cache._write_disk(key, time.time() + cache.ttl, {"padding": "x" * size})
+    path = cache._path(key)
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_prune_removes_expired_then_oldest(tmp_path):
+    cache = LLMCache(ttl=1000, directory=str(tmp_path))
+    expired = _write(cache, "aa" + "0" * 62, age=2000)
+    oldest = _write(cache, "bb" + "0" * 62, age=30)
+    newer = [_write(cache, f"c{i}" + "0" * 62, age=20 - i) for i in range(2)]
+    cache.max_disk_bytes = sum(os.path.getsize(p) for p in newer)  # room for the two newest files
+
+    assert cache.prune_disk() == 2
+    assert not os.path.exists(expired) and not os.path.exists(oldest)
+    assert all(os.path.exists(p) for p in newer)
+    stats = cache.stats()
+    assert (stats["disk_expired"], stats["disk_evictions"]) == (1, 1)
+    assert stats["disk_bytes"] == sum(os.path.getsize(p) for p in newer) <= cache.max_disk_bytes
+
+
+def test_prune_removes_stale_temp_files(tmp_path):
+    cache = LLMCache(directory=str(tmp_path))
+    stale = tmp_path / "ab" / "x.json.1234.tmp"
+    stale.parent.mkdir()
+    stale.write_text("{")
+    os.utime(stale, (0, 0))
+    assert cache.prune_disk() == 1
+    assert not stale.exists()
+
+
+def test_writes_prune_and_stats_are_exported(tmp_path, monkeypatch):
+    cache = LLMCache(maxsize=1, directory=str(tmp_path), max_disk_bytes=0, prune_interval=0)
+    monkeypatch.setattr(llm_cache, "_cache", cache)
+
+    async def run():
+        await cache.aset("k1", AIMessage(content="one"))
+        assert await cache.aget("k1") is not None
+        assert await cache.aget("k2") is None
+
+    asyncio.run(run())
+    lines = metrics.render().splitlines()
+    assert 'llm_cache_lookups_total{result="hit"} 1' in lines
+    assert 'llm_cache_lookups_total{result="miss"} 1' in lines
+    assert 'llm_cache_evictions_total{reason="disk_size"} 1' in lines
+    assert "llm_cache_entries 1" in lines
+    assert "llm_cache_disk_bytes 0" in lines
@@ -0,0 +1,29 @@
+import asyncio
+from types import SimpleNamespace
+
+from app import metrics
+from app.tools import memo
+
+
+def _lines(prefix: str) -> list[str]:
+    return [line for line in metrics.render().splitlines() if line.startswith(prefix)]
+
+
+def test_tool_memo_counters_are_exported(monkeypatch):
+    async def catalog(_db):
+        return SimpleNamespace(version=1)
+
+    async def compute():
+        return "[]"
+
+    monkeypatch.setattr(memo, "get_catalog", catalog)
+    monkeypatch.setattr(memo, "tool_memo", memo.ToolMemo(maxsize=1))
+    for args in [("CPU",), ("CPU",), ("GPU",)]:
+        asyncio.run(memo.tool_memo.get_or_compute(None, "search_parts", args, compute))
+
+    assert _lines("tool_memo_lookups_total{") == [
+        'tool_memo_lookups_total{tool="search_parts",result="hit"} 1',
+        'tool_memo_lookups_total{tool="search_parts",result="miss"} 2',
+    ]
+    assert _lines("tool_memo_evictions_total ") == ["tool_memo_evictions_total 1"]
+    assert _lines("tool_memo_entries ") == ["tool_memo_entries 1"]
@@ -0,0 +1,96 @@
+import pytest
+
+from app.db.catalog import CatalogSnapshot
+from app.db.compat import normalize_specs
+from app.tools.optimize import USE_CASE_WEIGHTS, optimize
+
+# (id, category, name, price_usd): an AM4/DDR4 platform priced below a fuller AM5/DDR5 one
+PARTS = [
+    ("cpu-5600", "CPU", "AMD Ryzen 5 5600", 99.0),
+    ("cpu-5800x3d", "CPU", "AMD Ryzen 7 5800X3D", 289.0),
+    ("cpu-7600", "CPU", "AMD Ryzen 5 7600", 189.0),
+    ("cpu-9800x3d", "CPU", "AMD Ryzen 7 9800X3D", 479.0),
+    ("mb-b550", "Motherboard", "MSI B550 Gaming Plus DDR4", 109.0),
+    ("mb-x570", "Motherboard", "ASUS TUF X570-Plus DDR4", 169.0),
+    ("mb-b650m", "Motherboard", "Gigabyte B650M DS3H DDR5", 129.0),
+    ("mb-x870", "Motherboard", "ASUS ROG Strix X870-E DDR5", 399.0),
+    ("ram-ddr4-16", "Memory", "Corsair Vengeance LPX 16GB DDR4-3200", 39.0),
+    ("ram-ddr4-32", "Memory", "G.Skill Ripjaws V 32GB DDR4-3600", 69.0),
+    ("ram-ddr5-32", "Memory", "Kingston Fury Beast 32GB DDR5-6000", 99.0),
+    ("ram-ddr5-64", "Memory", "G.Skill Trident Z5 64GB DDR5-6400", 219.0),
+    ("cool-1", "CPU Cooler", "Thermalright Peerless Assassin 120", 35.0),
+    ("cool-2", "CPU Cooler", "Arctic Liquid Freezer III 360", 109.0),
+    ("ssd-1", "Storage", "WD Blue SN580 1TB", 59.0),
+    ("ssd-2", "Storage", "Samsung 990 Pro 2TB", 169.0),
+    ("gpu-4060", "GPU", "NVIDIA GeForce RTX 4060", 299.0),
+    ("gpu-4090", "GPU", "NVIDIA GeForce RTX 4090", 1799.0),
+    ("case-1", "Case", "Montech AIR 903", 69.0),
+    ("case-2", "Case", "Lian Li O11 Dynamic EVO", 159.0),
+    ("psu-550", "Power Supply", "Corsair CX 550W", 59.0),
+    ("psu-1000", "Power Supply", "Corsair RM1000x 1000W", 189.0),
+]
+
+
+@pytest.fixture(scope="module")
+def catalog() -> CatalogSnapshot:
+    rows = [(pid, cat, name, price, None, normalize_specs(cat, name, None)) for pid, cat, name, price in PARTS]
+    return CatalogSnapshot(1, rows)
+
+
+def _by_category(result: dict) -> dict[str, dict]:
+    return {p["category"]: p for p in result["parts"]}
+
+
+@pytest.mark.parametrize("use_case", list(USE_CASE_WEIGHTS))
+@pytest.mark.parametrize("budget", [1000, 1500, 2500, 4000])
+@pytest.mark.parametrize("cpu_id", ["cpu-5600", "cpu-5800x3d"])
+def test_pinned_am4_cpu_never_gets_am5_board_or_ddr5(catalog, use_case, budget, cpu_id):
+    result = optimize(catalog, budget, 0.0, use_case=use_case, include_os=False, pinned_part_ids=[cpu_id])
+    parts = _by_category(result)
+    assert parts["CPU"]["id"] == cpu_id
+    assert parts["Motherboard"]["id"] in ("mb-b550", "mb-x570")
+    assert parts["Memory"]["id"].startswith("ram-ddr4")
+
+
+@pytest.mark.parametrize("budget", [1000, 1500, 2500, 4000])
+def test_unpinned_builds_are_compatible(catalog, budget):
+    parts = _by_category(optimize(catalog, budget, 0.0, include_os=False))
+    socket = "AM4" if parts["CPU"]["id"] in ("cpu-5600", "cpu-5800x3d") else "AM5"
+    assert (parts["Motherboard"]["id"] in ("mb-b550", "mb-x570")) == (socket == "AM4")
+    assert parts["Memory"]["id"].startswith("ram-ddr4" if socket == "AM4" else "ram-ddr5")
+    if parts["GPU"]["id"] == "gpu-4090":
+        assert parts["Power Supply"]["id"] == "psu-1000"
+
+
+def test_no_compatible_part_for_pinned_is_an_error(catalog):
+    result = optimize(catalog, 3000, 0.0, include_os=False, pinned_part_ids=["cpu-5600", "mb-x870"])
+    assert "error" in result
+
+
+def test_incompatible_pins_are_an_error(catalog):
+    result = optimize(
+        catalog, 3000, 0.0, include_os=False, pinned_part_ids=["cpu-5600", "mb-x870", "ram-ddr5-32"]
+    )
+    assert "not compatible" in result["error"]
+
+
+def test_two_pins_in_one_category_are_an_error(catalog):
+    result = optimize(catalog, 3000, 0.0, include_os=False, pinned_part_ids=["cpu-5600", "cpu-7600"])
+    assert "both in category CPU" in result["error"]
+
+
+def test_compatible_pins_are_kept(catalog):
+    pins = ["cpu-7600", "mb-b650m", "ram-ddr5-32", "cpu-7600"]
+    parts = _by_category(optimize(catalog, 3000, 0.0, include_os=False, pinned_part_ids=pins))
+    assert [parts[c]["id"] for c in ("CPU", "Motherboard", "Memory")] == pins[:3]
+
+
+def test_scenarios_and_hulls_are_cached_on_the_snapshot():
+    rows = [(pid, cat, name, price, None, normalize_specs(cat, name, None)) for pid, cat, name, price in PARTS]
+    catalog = CatalogSnapshot(1, rows)
+    first = optimize(catalog, 2000, 0.0, include_os=False)
+    cached = dict(catalog._derived)
+    assert any(key[0] == "optimize.scenarios" for key in cached)
+    assert any(key[0] == "optimize.hull" for key in cached)
+    assert optimize(catalog, 2000, 0.0, include_os=False) == first
+    assert all(catalog._derived[key] is value for key, value in cached.items())
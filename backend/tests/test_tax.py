@@ -0,0 +1,47 @@
+import pytest
+
+from pc_tax import TaxTable, get_tax_rate, get_tax_table
+
+
+@pytest.mark.parametrize(
+    "region, state",
+    [
+        ("CA", "CA"),
+        ("california", "CA"),
+        ("Washington, D.C.", "DC"),
+        ("San Jose, CA", "CA"),
+        ("Austin, Texas", "TX"),
+        ("94103", "CA"),
+        ("10001-1234", "NY"),
+        ("12345 Main St, Springfield 62704", "IL"),
+        ("Narnia", None),
+        ("", None),
+    ],
+)
+def test_state_for(region, state):
+    assert get_tax_table().state_for(region) == state
+
+
+def test_zip_code_gets_its_state_base_rate():
+    assert get_tax_rate("94501") == get_tax_rate("CA") > 0
+    assert get_tax_rate("97201") == get_tax_rate("OR") == 0.0
+    assert get_tax_rate("unknown") == 0.0
+
+
+def test_listed_zip_prefix_gets_combined_local_rate():
+    assert get_tax_rate("60601") == 0.1025 > get_tax_rate("62704") == get_tax_rate("IL")
+    assert get_tax_rate("94103") == 0.08625
+    assert get_tax_rate("New York, NY 10001") == 0.08875 > get_tax_rate("NY")
+
+
+def test_five_digit_zip_overrides_prefix():
+    table = TaxTable(
+        states={"IL": ("Illinois", 0.0625)},
+        zip3=[(600, 629, "IL")],
+        zip_rates={"606": 0.1025, "60666": 0.11},
+    )
+    assert table.rate("60666") == 0.11
+    assert table.rate("60601") == 0.1025
+    assert table.rate("62704") == 0.0625
+    with pytest.raises(ValueError):
+        TaxTable(states={}, zip_rates={"6060": 0.1})
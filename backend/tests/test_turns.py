@@ -0,0 +1,130 @@
+import asyncio
+
+import pytest
+
+from app.api.turns import SessionTurns
+
+
+async def _submit(turns: SessionTurns, session_id: str, message: str, work) -> object:
+    # Same protocol as POST /api/chat: share an in-flight duplicate, else run in the session's turn
+    if pending := turns.pending(session_id, message):
+        return await asyncio.shield(pending)
+    async with turns.turn(session_id, message) as shared:
+        result = await work()
+        shared.set_result(result)
+    return result
+
+
+def test_turns_for_one_session_run_in_arrival_order():
+    async def main():
+        turns = SessionTurns()
+        log: list[str] = []
+
+        def work(name: str, delay: float):
+            async def run():
+                log.append(f"start {name}")
+                await asyncio.sleep(delay)
+                log.append(f"end {name}")
+                return name
+            return run
+
+        first = asyncio.create_task(_submit(turns, "s1", "first", work("first", 0.02)))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(_submit(turns, "s1", "second", work("second", 0)))
+        return await asyncio.gather(first, second), log
+
+    results, log = asyncio.run(main())
+    assert results == ["first", "second"]
+    assert log == ["start first", "end first", "start second", "end second"]
+
+
+def test_duplicate_submission_shares_the_original_result():
+    async def main():
+        turns = SessionTurns()
+        calls = 0
+        release = asyncio.Event()
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return {"reply": "hello"}
+
+        original = asyncio.create_task(_submit(turns, "s1", "hi", work))
+        await asyncio.sleep(0)
+        duplicate = asyncio.create_task(_submit(turns, "s1", "hi", work))
+        await asyncio.sleep(0)
+        release.set()
+        return await asyncio.gather(original, duplicate), calls
+
+    (original, duplicate), calls = asyncio.run(main())
+    assert calls == 1
+    assert duplicate is original == {"reply": "hello"}
+
+
+def test_duplicate_submission_gets_the_original_exception():
+    async def main():
+        turns = SessionTurns()
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            raise ValueError("graph failed")
+
+        original = asyncio.create_task(_submit(turns, "s1", "hi", work))
+        await asyncio.sleep(0)
+        duplicate = asyncio.create_task(_submit(turns, "s1", "hi", work))
+        await asyncio.sleep(0)
+        release.set()
+        return await asyncio.gather(original, duplicate, return_exceptions=True)
+
+    original, duplicate = asyncio.run(main())
+    assert isinstance(original, ValueError)
+    assert duplicate is original
+
+
+def test_separate_sessions_do_not_block_each_other():
+    async def main():
+        turns = SessionTurns()
+        release = asyncio.Event()
+
+        async def blocked():
+            await release.wait()
+            return "s1"
+
+        async def quick():
+            return "s2"
+
+        slow = asyncio.create_task(_submit(turns, "s1", "hi", blocked))
+        await asyncio.sleep(0)
+        # Finishes while s1's turn still holds its lock
+        other = await asyncio.wait_for(_submit(turns, "s2", "hi", quick), timeout=1)
+        assert not slow.done()
+        release.set()
+        return other, await slow
+
+    assert asyncio.run(main()) == ("s2", "s1")
+
+
+@pytest.mark.parametrize("fails", [False, True])
+def test_lock_entries_are_removed_after_the_turn(fails):
+    async def main():
+        turns = SessionTurns()
+
+        async def work():
+            await asyncio.sleep(0)
+            if fails:
+                raise ValueError("graph failed")
+            return "ok"
+
+        results = await asyncio.gather(
+            _submit(turns, "s1", "a", work), _submit(turns, "s1", "b", work), return_exceptions=True
+        )
+        abandoned = turns.turn("s2", "never started")
+        await abandoned.abandon()
+        return turns, results
+
+    turns, results = asyncio.run(main())
+    assert len(results) == 2
+    assert turns._locks == {}
+    assert turns._inflight == {}
@@ -1,12 +1,12 @@
 """Part curation: use LLM to suggest parts and price lookup to build a full Build."""
 
 import logging
-import re
 from typing import Optional
 
 from pc_builder.llm import ChatSession
 from pc_builder.models import Build, Part
 from pc_builder.price_lookup import PART_CATEGORIES, PriceLookup
+from pc_tax import get_tax_rate
 
 logger = logging.getLogger(__name__)
 
@@ -19,36 +19,32 @@ OS_PART = Part(
 )
 
 
-def parse_tax_rate(raw: str) -> float:
-    """Parse LLM response to a float tax rate (e.g. 0.0725)."""
-    raw = (raw or "").strip()
-    # Remove common suffixes/prefixes
-    raw = re.sub(r"%|percent|tax\s*rate\s*[:=]?", "", raw, flags=re.IGNORECASE)
-    raw = raw.strip()
-    try:
-        return float(raw)
-    except ValueError:
-        return 0.0
-
-
 def parse_part_list(response: str) -> list[str]:
     """Parse comma-separated part names from LLM response. Expects 8 parts."""
     parts = [p.strip() for p in response.split(",") if p.strip()]
     return parts[:8] if len(parts) >= 8 else parts
 
 
+def resolve_tax_rate(region: str) -> float:
+    """Sales tax rate for a US state code, state name or ZIP code, from the same table the backend uses."""
+    return get_tax_rate(region)
+
+
 def curate_parts(
     chat: ChatSession,
     price_lookup: PriceLookup,
     preferences: str,
     budget: float,
-    tax_rate: float,
+    tax_rate: float | str,
     max_attempts: int = 5,
 ) -> Optional[Build]:
     """
     Get part suggestions from the LLM, resolve prices, and return a Build within budget.
     Budget is total including tax; we reserve ~120 for OS and aim for subtotal + tax <= budget.
+    tax_rate is a decimal rate, or a state code, state name or ZIP code resolved with resolve_tax_rate.
     """
+    if isinstance(tax_rate, str):
+        tax_rate = resolve_tax_rate(tax_rate)
     target_subtotal = budget - 120.0  # reserve for OS
     if target_subtotal <= 0:
         return None
@@ -63,10 +59,10 @@ def curate_parts(
             )
             continue
 
+        categories = [PART_CATEGORIES[i] if i < len(PART_CATEGORIES) else "Other" for i in range(len(names))]
+        resolved = price_lookup.lookup_many(zip(categories, names, strict=True))
         parts: list[Part] = []
-        for i, name in enumerate(names):
-            cat = PART_CATEGORIES[i] if i < len(PART_CATEGORIES) else "Other"
-            part = price_lookup.lookup(cat, name)
+        for cat, name, part in zip(categories, names, resolved, strict=True):
             if part is None:
                 chat.say(f"Part '{name}' could not be found. Suggest a different part for {cat}.")
                 break
@@ -43,14 +43,6 @@ class ChatSession:
         )
         return self.say(prompt).strip()
 
-    def get_tax_rate_response(self, state_or_region: str) -> str:
-        """Ask for a numeric tax rate (e.g. 0.0725) for the given state/region."""
-        prompt = (
-            f"For US state/region: '{state_or_region}', reply with only the sales tax rate as a decimal number "
-            "(e.g. 0.0725 for 7.25%). No explanation, no percent sign, just the number."
-        )
-        return self.say(prompt).strip()
-
     def get_next_state(self, current_state: str, user_message: str) -> str:
         """Determine next conversation state. Used by CLI flow."""
         prompt = (
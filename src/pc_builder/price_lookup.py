@@ -1,9 +1,13 @@
 """Price lookup for parts. Implementations can use APIs or static data (no scraping)."""
 
+import json
 import logging
+import math
 import re
+import sqlite3
 from abc import ABC, abstractmethod
-from typing import Optional
+from collections.abc import Iterable, Mapping
+from functools import lru_cache
 
 from pc_builder.models import Part
 
@@ -29,10 +33,14 @@ class PriceLookup(ABC):
     """Abstract interface for resolving part names to Part (name, price, link)."""
 
     @abstractmethod
-    def lookup(self, category: str, product_name: str) -> Optional[Part]:
+    def lookup(self, category: str, product_name: str) -> Part | None:
         """Return Part if found, else None."""
         ...
 
+    def lookup_many(self, category_name_pairs: Iterable[tuple[str, str]]) -> list[Part | None]:
+        """Resolve several (category, product_name) pairs; results are in input order."""
+        return [self.lookup(category, name) for category, name in category_name_pairs]
+
 
 class MockPriceLookup(PriceLookup):
     """
@@ -53,7 +61,7 @@ class MockPriceLookup(PriceLookup):
         "Operating System": "119.99",
     }
 
-    def lookup(self, category: str, product_name: str) -> Optional[Part]:
+    def lookup(self, category: str, product_name: str) -> Part | None:
         clean_name = (product_name or "").strip()
         if not clean_name:
             return None
@@ -61,3 +69,140 @@ class MockPriceLookup(PriceLookup):
         search = re.sub(r"\s+", "+", clean_name)
         link = f"{PLACEHOLDER_LINK}{search}"
         return Part(category=category, name=clean_name, price=price, link=link)
+
+
+# Lowercase words and digit runs: "RTX4070-Super" and "rtx 4070 super" give the same tokens
+_TOKEN_RE = re.compile(r"[a-z]+|\d+")
+
+
+def name_tokens(name: str) -> tuple[str, ...]:
+    """Normalized, de-duplicated tokens of a part name, in first-seen order."""
+    return tuple(dict.fromkeys(_TOKEN_RE.findall((name or "").lower())))
+
+
+# Markers that tell otherwise identically named models apart: variant words of GPU names ("RTX 4070" vs
+# "RTX 4070 Ti SUPER"), letters glued to a model number ("7800X" vs "7800X3D", "i5-14400F", "RM850x",
+# "NH-D15S"; units such as "850W" excluded) and the DDR generation
+_GPU_VARIANT_RE = re.compile(r"(?:\b|\d)(ti|super|xtx|xt|gre|d)\b")
+_SUFFIX_RE = re.compile(r"\d(x3d|[a-z]{1,3})\b")
+_UNIT_SUFFIXES = frozenset({"w", "gb", "tb", "mb", "mhz", "hz", "mm", "cm", "st", "nd", "rd", "th", "p"})
+_DDR_RE = re.compile(r"\b(ddr\d)")
+_CAPACITY_RE = re.compile(r"(\d+)\s?(gb|tb)\b")
+# Model numbers, wattages and speeds ("990", "850", "6000")
+_MODEL_NUMBER_RE = re.compile(r"\d{3,}")
+
+Markers = tuple[frozenset[str], frozenset[str], frozenset[str]]
+
+
+def model_markers(category: str, name: str) -> Markers:
+    """(variant markers, capacities such as "16gb", numbers of 3+ digits) of a part name."""
+    lower = (name or "").lower()
+    variants = set(_SUFFIX_RE.findall(lower)) - _UNIT_SUFFIXES
+    variants.update(_DDR_RE.findall(lower))
+    if category == "GPU":
+        variants.update(_GPU_VARIANT_RE.findall(lower))
+    return (
+        frozenset(variants),
+        frozenset(n + unit for n, unit in _CAPACITY_RE.findall(lower)),
+        frozenset(_MODEL_NUMBER_RE.findall(lower)),
+    )
+
+
+def _same_model(query: Markers, candidate: Markers) -> bool:
+    # Variant markers must agree exactly; a capacity in the candidate must be one the query names
+    # (kits list several: "32GB (2x16GB)"); every model number in the query must be in the candidate
+    variants, capacities, numbers = query
+    if variants != candidate[0] or not numbers <= candidate[2]:
+        return False
+    return not candidate[1] or bool(capacities & candidate[1])
+
+
+class CatalogPriceLookup(PriceLookup):
+    """
+    Lookup against the backend parts catalog (category, name, price_usd, link records).
+
+    Names are matched fuzzily through a per-category inverted token index: candidates share at least
+    one token with the query and are scored by IDF-weighted Dice overlap, so rare tokens such as model
+    numbers decide the match ("RTX 4070 Super" -> "NVIDIA GeForce RTX 4070 SUPER") while brand words
+    count for little. Candidates that differ from the query in a model variant (Ti, SUPER, XT, X3D, K/F
+    suffixes), in capacity or in a model number are never accepted, so a near miss resolves to None rather than to a
+    different product. Results are cached in an LRU keyed by the normalized query.
+    """
+
+    # Lowest overlap score accepted as a match (1.0 = same token set)
+    MIN_SCORE = 0.6
+
+    def __init__(self, records: Iterable[Mapping], cache_size: int = 4096) -> None:
+        self._parts: list[Part] = []
+        self._weights: list[float] = []  # total IDF of each part's tokens
+        self._markers: list[Markers] = []  # model_markers of each part
+        self._postings: dict[str, dict[str, list[int]]] = {}  # category -> token -> part indexes
+        self._idf: dict[str, dict[str, float]] = {}
+        part_tokens: list[tuple[str, ...]] = []
+        for r in records:
+            price = float(r["price_usd"])
+            self._parts.append(Part(category=r["category"], name=r["name"], price=f"{price:.2f}", link=r.get("link")))
+            tokens = name_tokens(r["name"])
+            part_tokens.append(tokens)
+            self._markers.append(model_markers(r["category"], r["name"]))
+            postings = self._postings.setdefault(r["category"], {})
+            for token in tokens:
+                postings.setdefault(token, []).append(len(self._parts) - 1)
+        for category, postings in self._postings.items():
+            n = len({i for ids in postings.values() for i in ids})
+            self._idf[category] = {t: math.log(1 + n / len(ids)) for t, ids in postings.items()}
+        for part, tokens in zip(self._parts, part_tokens, strict=True):
+            idf = self._idf[part.category]
+            self._weights.append(sum(idf[t] for t in tokens))
+        self._match = lru_cache(maxsize=cache_size)(self._best_match)
+
+    @classmethod
+    def from_sqlite(cls, path: str, **kwargs) -> "CatalogPriceLookup":
+        """Load the backend's parts table (path to the SQLite file, or a sqlite:/// DATABASE_URL)."""
+        path = re.sub(r"^sqlite:///", "", path)
+        with sqlite3.connect(f"file:{path}?mode=ro", uri=True) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute("SELECT category, name, price_usd, link FROM parts").fetchall()
+        return cls([dict(r) for r in rows], **kwargs)
+
+    @classmethod
+    def from_json(cls, path: str, **kwargs) -> "CatalogPriceLookup":
+        """Load a JSON array of parts (e.g. data/parts_seed.json)."""
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f), **kwargs)
+
+    def lookup(self, category: str, product_name: str) -> Part | None:
+        tokens = name_tokens(product_name)
+        if not tokens:
+            return None
+        return self._match(category, tokens, model_markers(category, product_name))
+
+    def cache_info(self):
+        """Hit/miss statistics of the match cache."""
+        return self._match.cache_info()
+
+    def _best_match(
+        self, category: str, tokens: tuple[str, ...], markers: Markers
+    ) -> Part | None:
+        postings = self._postings.get(category)
+        if not postings:
+            return None
+        idf = self._idf[category]
+        # Query words the category never uses ("NVMe", "80+", "MHz") weigh as little as its commonest word:
+        # model differences are caught by the markers, so extra description should not sink a match
+        unseen = min(idf.values())
+        query_weight = sum(idf.get(t, unseen) for t in tokens)
+        shared: dict[int, float] = {}
+        for token in tokens:
+            for i in postings.get(token, ()):
+                shared[i] = shared.get(i, 0.0) + idf[token]
+        scores = {
+            i: 2 * weight / (query_weight + self._weights[i])
+            for i, weight in shared.items()
+            if _same_model(markers, self._markers[i])
+        }
+        best = max(scores, key=lambda i: (scores[i], -i), default=None)  # ties: first in the catalog
+        if best is None or scores[best] < self.MIN_SCORE:
+            logger.debug("No catalog match for %s '%s'", category, " ".join(tokens))
+            return None
+        return self._parts[best]
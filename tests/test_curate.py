@@ -0,0 +1,34 @@
+import pytest
+
+from pc_builder.curate import curate_parts, resolve_tax_rate
+from pc_builder.price_lookup import MockPriceLookup
+
+PART_LIST = (
+    "AMD Ryzen 7 7800X3D, Thermalright Peerless Assassin 120, MSI B650 Tomahawk, Corsair Vengeance 32GB DDR5, "
+    "Samsung 990 Pro 2TB, NVIDIA RTX 4070, Fractal Design North, Corsair RM750e 750W"
+)
+
+
+class FakeChat:
+    """Stands in for ChatSession: always suggests PART_LIST."""
+
+    def get_part_list_response(self, preferences: str, budget_usd: float) -> str:
+        return PART_LIST
+
+    def say(self, user_content: str) -> str:
+        return ""
+
+
+@pytest.mark.parametrize(
+    ("region", "rate"),
+    [("60601", 0.1025), ("Chicago, IL 60601", 0.1025), ("62704", 0.0625), ("IL", 0.0625), ("94103", 0.08625)],
+)
+def test_resolve_tax_rate_uses_shared_table(region, rate):
+    assert resolve_tax_rate(region) == pytest.approx(rate)
+
+
+def test_curate_parts_resolves_region_to_combined_rate():
+    build = curate_parts(FakeChat(), MockPriceLookup(), "1440p gaming", budget=3000.0, tax_rate="60601")
+    assert build is not None
+    assert build.tax_rate == pytest.approx(0.1025)
+    assert build.total() == round(build.subtotal() * 1.1025, 2)
@@ -0,0 +1,78 @@
+import pytest
+
+from pc_builder.price_lookup import CatalogPriceLookup, MockPriceLookup
+
+RECORDS = [
+    {"category": "GPU", "name": "NVIDIA GeForce RTX 4070 Ti SUPER", "price_usd": 799.99, "link": None},
+    {"category": "GPU", "name": "NVIDIA GeForce RTX 4090", "price_usd": 1799.0, "link": None},
+    {"category": "GPU", "name": "AMD Radeon RX 7900 XT", "price_usd": 649.0, "link": None},
+    {"category": "GPU", "name": "AMD Radeon RX 9060 XT 16GB", "price_usd": 349.0, "link": None},
+    {"category": "CPU", "name": "AMD Ryzen 7 7800X3D", "price_usd": 449.0, "link": None},
+    {"category": "CPU", "name": "Intel Core i7-14700KF", "price_usd": 379.0, "link": None},
+    {"category": "CPU", "name": "AMD Ryzen 5 5600", "price_usd": 99.0, "link": None},
+    {"category": "Memory", "name": "Corsair Vengeance DDR5-6000 32GB", "price_usd": 109.0, "link": None},
+    {"category": "Storage", "name": "Samsung 990 Pro 2TB", "price_usd": 169.0, "link": None},
+    {"category": "Power Supply", "name": "Corsair RM850x 850W", "price_usd": 129.0, "link": None},
+    {"category": "Power Supply", "name": "Corsair RM750e 750W", "price_usd": 89.0, "link": None},
+]
+
+
+@pytest.fixture(scope="module")
+def lookup() -> CatalogPriceLookup:
+    return CatalogPriceLookup(RECORDS)
+
+
+@pytest.mark.parametrize(
+    "category, query, expected",
+    [
+        ("GPU", "RTX 4070 Ti Super", "NVIDIA GeForce RTX 4070 Ti SUPER"),
+        ("GPU", "geforce rtx4090", "NVIDIA GeForce RTX 4090"),
+        ("GPU", "Radeon RX 7900XT", "AMD Radeon RX 7900 XT"),
+        ("GPU", "RX 9060 XT 16GB Graphics Card", "AMD Radeon RX 9060 XT 16GB"),
+        ("CPU", "Ryzen 7 7800X3D", "AMD Ryzen 7 7800X3D"),
+        ("CPU", "Intel Core i7-14700KF Processor", "Intel Core i7-14700KF"),
+        ("Memory", "Corsair Vengeance 32GB (2x16GB) DDR5 6000MHz", "Corsair Vengeance DDR5-6000 32GB"),
+        ("Storage", "Samsung 990 Pro 2TB NVMe SSD", "Samsung 990 Pro 2TB"),
+        ("Power Supply", "Corsair RM850x 850W 80+ Gold", "Corsair RM850x 850W"),
+    ],
+)
+def test_matches(lookup, category, query, expected):
+    part = lookup.lookup(category, query)
+    assert part is not None and part.name == expected
+
+
+@pytest.mark.parametrize(
+    "category, query",
+    [
+        # Variant words and suffixes the catalog part lacks, or has and the query lacks
+        ("GPU", "RTX 4070"),
+        ("GPU", "RTX 4070 Super"),
+        ("GPU", "RTX 4070 Ti"),
+        ("GPU", "Radeon RX 7900 XTX"),
+        ("GPU", "RX 9060 XT 8GB"),
+        ("CPU", "Ryzen 7 7800X"),
+        ("CPU", "Intel Core i7-14700K"),
+        ("CPU", "Ryzen 5 5600X"),
+        # Other capacity, memory generation, model number or model suffix
+        ("GPU", "RX 9060 XT"),
+        ("Memory", "Corsair Vengeance DDR5-6000 16GB"),
+        ("Memory", "Corsair Vengeance DDR4-3200 32GB"),
+        ("Storage", "Samsung 980 Pro 2TB"),
+        ("Power Supply", "Corsair RM750x 750W"),
+        ("Power Supply", "Corsair RM1000x"),
+    ],
+)
+def test_near_misses_resolve_to_none(lookup, category, query):
+    assert lookup.lookup(category, query) is None
+
+
+def test_lookup_many_keeps_order_and_caches(lookup):
+    pairs = [("CPU", "Ryzen 5 5600"), ("GPU", "RTX 4070"), ("CPU", "ryzen 5 5600")]
+    parts = lookup.lookup_many(pairs)
+    assert [p.name if p else None for p in parts] == ["AMD Ryzen 5 5600", None, "AMD Ryzen 5 5600"]
+    assert lookup.cache_info().hits >= 1
+
+
+def test_mock_lookup_uses_placeholder_link():
+    part = MockPriceLookup().lookup("GPU", "RTX 4070 Super")
+    assert part.link.endswith("RTX+4070+Super")